@@ -1,5 +1,8 @@
 # ... (keep all previous import statements)
 import numpy as np  # Add this import at the top if not present
+from icon_assets import icon_image  # Pre-scaled icons, decoded once per process
+
+ICON_OVERLAY_SIZE = 128  # px; the overlay is drawn at ~1 day wide, never near full size
 
 # Add a new chart type: 'soil' in ChartCanvas class
 class ChartCanvas(FigureCanvas):
@@ -20,9 +23,10 @@ class ChartCanvas(FigureCanvas):
             self.draw()
             return
 
-        days = [datetime.strptime(d, '%Y-%m-%d').strftime('%a') for d in self.weather_data['daily']['time']]
-        temperature = self.weather_data['daily']['temperature_2m_max']
-        rainfall = self.weather_data['daily']['precipitation_sum']
+        # self.weather_data is a forecast.Forecast
+        days = list(self.weather_data.day_labels)
+        temperature = self.weather_data.temp_max
+        rainfall = self.weather_data.precipitation
 
         if self.chart_type == 'line':
             ax.plot(days, temperature, marker='o', color='green', label="Temperature")
@@ -45,11 +49,7 @@ class ChartCanvas(FigureCanvas):
             ax.set_ylabel("Temp (°C)")
 
         elif self.chart_type == 'pie':
-            sunny = sum(1 for t in temperature if t > 30)
-            rainy = sum(1 for r in rainfall if r > 5)
-            cloudy = max(5 - sunny - rainy, 0)
-            values = [sunny, cloudy, rainy]
-            values = [v if v >= 0 else 0 for v in values]
+            values = list(self.weather_data.weather_counts)
 
             if sum(values) == 0:
                 ax.text(0.5, 0.5, "No weather data to plot pie chart", ha='center', va='center')
@@ -68,7 +68,7 @@ class ChartCanvas(FigureCanvas):
         # Show weather image in charts (except pie)
         if self.icon_path and os.path.exists(self.icon_path) and self.chart_type != 'pie':
             try:
-                image = mpimg.imread(self.icon_path)
+                image = icon_image(self.icon_path, ICON_OVERLAY_SIZE)
                 ax.imshow(image, aspect='auto', extent=[5.5, 6.5, max(ax.get_ylim())*0.8, max(ax.get_ylim())], alpha=0.3)
             except Exception as e:
                 print("Image overlay error:", e)
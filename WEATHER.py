@@ -1,101 +1,39 @@
 import sys
-import requests
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget,
-    QLabel, QTabWidget, QHBoxLayout, QLineEdit, QPushButton
+    QLabel, QTabWidget, QHBoxLayout, QLineEdit, QPushButton, QCompleter, QShortcut
 )
-from PyQt5.QtGui import QPixmap, QFont
-from PyQt5.QtCore import Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from datetime import datetime
+from PyQt5.QtGui import QFont, QKeySequence, QPixmap
+from PyQt5.QtCore import Qt, QStringListModel, QTimer
+
+from forecast import load_forecast, parse_forecast
+from garden_workers import WeatherLoader, startup_location
+from geocoder import suggest_cities
+from icon_assets import ICON_TEXT, icon_for_weather, icon_pixmap
+from instrumentation import ENABLED as TRACING, profiled, traced
+from startup_snapshot import load_snapshot, save_snapshot
 
 # ------------------- WEATHER FETCH -----------------------
 
-def get_coordinates(city_name):
-    try:
-        url = f"https://geocoding-api.open-meteo.com/v1/search?name={city_name}&count=1"
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            if "results" in data and data["results"]:
-                lat = data["results"][0]["latitude"]
-                lon = data["results"][0]["longitude"]
-                return lat, lon
-    except:
-        pass
-    return None, None
+DAILY_VARS = ("temperature_2m_max", "temperature_2m_min", "precipitation_sum")
 
+@traced("app.get_weather_data")
 def get_weather_data(lat=28.61, lon=77.20):  # Default Delhi
-    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&daily=temperature_2m_max,temperature_2m_min,precipitation_sum&timezone=auto"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    return None
+    return load_forecast(lat, lon, DAILY_VARS)
 
 # ------------------- CHART CANVAS ------------------------
 
-class ChartCanvas(FigureCanvas):
-    def __init__(self, chart_type, weather_data=None):
-        self.fig = Figure(figsize=(5, 4), dpi=100)
-        super().__init__(self.fig)
-        self.chart_type = chart_type
-        self.weather_data = weather_data
-        self.draw_chart()
-
-    def draw_chart(self):
-        ax = self.fig.add_subplot(111)
-        ax.clear()
-
-        if self.chart_type == 'nutrient':
-            labels = ['Nitrogen', 'Phosphorus', 'Potassium', 'Calcium', 'Magnesium', 'Sulfur']
-            values = [25, 20, 20, 10, 15, 10]  # Simulated %
-            colors = ['#FF9999', '#66B3FF', '#99FF99', '#FFCC99', '#C2C2F0', '#FFD700']
-            ax.pie(values, labels=labels, autopct='%1.1f%%', colors=colors, startangle=140)
-            ax.set_title("Soil Nutrient Composition")
-            self.draw()
-            return
-
-        if not self.weather_data:
-            ax.text(0.5, 0.5, "No weather data available", ha='center', va='center')
-            self.draw()
-            return
-
-        days = [datetime.strptime(d, '%Y-%m-%d').strftime('%a') for d in self.weather_data['daily']['time']]
-        temp_max = self.weather_data['daily']['temperature_2m_max']
-        temp_min = self.weather_data['daily']['temperature_2m_min']
-        rainfall = self.weather_data['daily']['precipitation_sum']
-
-        if self.chart_type == 'line':
-            ax.plot(days, temp_max, marker='o', label='Max Temp', color='red')
-            ax.plot(days, temp_min, marker='o', label='Min Temp', color='blue')
-            ax.fill_between(days, temp_min, temp_max, color='lightpink', alpha=0.5)
-            ax.set_title("Temperature Range Over Days")
-            ax.set_ylabel("Temperature (°C)")
-            ax.legend()
-
-        elif self.chart_type == 'bar':
-            ax.bar(days, rainfall, color='deepskyblue')
-            ax.set_title("Rainfall Forecast")
-            ax.set_ylabel("Rainfall (mm)")
-
-        elif self.chart_type == 'area':
-            ax.fill_between(days, temp_max, color='orange', alpha=0.4)
-            ax.set_title("Area Chart - Max Temperature")
-            ax.set_ylabel("Temperature (°C)")
-
-        elif self.chart_type == 'pie':
-            sunny = sum(1 for t in temp_max if t > 30)
-            rainy = sum(1 for r in rainfall if r > 5)
-            cloudy = max(len(days) - sunny - rainy, 0)
-            values = [sunny, cloudy, rainy]
-            if sum(values) == 0:
-                ax.text(0.5, 0.5, "Not enough data", ha='center', va='center')
-            else:
-                ax.pie(values, labels=['Sunny', 'Cloudy', 'Rainy'],
-                       autopct='%1.1f%%', colors=['orange', 'gray', 'blue'])
-                ax.set_title("Weather Distribution")
-        self.draw()
+# ChartCanvas (garden_canvas.py) pulls in matplotlib, so it is only imported
+# once the window is on screen; see hydrate_charts
+CHART_TABS = [
+    ('line', "Temperature Line"),
+    ('bar', "Rainfall Bar"),
+    ('area', "Area Temp"),
+    ('pie', "Weather Type Pie"),
+    ('nutrient', "Soil Nutrients Pie"),
+    ('ensemble', "Moisture Outlook"),
+]
+APP_NAME = "weather"  # snapshot folder
 
 # ------------------- MAIN APP ------------------------
 
@@ -104,9 +42,24 @@ class WeatherApp(QMainWindow):
         super().__init__()
         self.setWindowTitle("🌱 Smart Garden Weather Simulator")
         self.setGeometry(100, 100, 950, 720)
-        self.weather_data = get_weather_data()
+        # Paint straight away from the last session's location (its cached forecast
+        # and chart images), then hydrate in the background
+        self.snapshot = load_snapshot(APP_NAME)
+        self.location, cached = startup_location(DAILY_VARS, self.snapshot)
+        self.weather_data = parse_forecast(cached)
+        self.loader = WeatherLoader(get_weather_data, self)
+        self.loader.loaded.connect(self.on_weather_loaded)
+        self.loader.failed.connect(self.on_weather_failed)
         self.initUI()
+        if self.location and self.location['city']:
+            self.title.setText(f"🌤 Smart Garden - {self.location['city'].title()}")
 
+        lat, lon = (28.61, 77.20)  # Default Delhi
+        if self.location:
+            lat, lon = self.location['lat'], self.location['lon']
+        self.loader.load_location(lat, lon)
+
+    @traced("app.initUI")
     def initUI(self):
         self.main_widget = QWidget()
         self.layout = QVBoxLayout()
@@ -120,6 +73,13 @@ class WeatherApp(QMainWindow):
         self.city_input.setPlaceholderText("Enter city name")
         self.city_input.setFixedWidth(200)
 
+        # Type-ahead from the local gazetteer (no network involved)
+        self.city_suggestions = QStringListModel()
+        completer = QCompleter(self.city_suggestions, self)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.city_input.setCompleter(completer)
+        self.city_input.textEdited.connect(self.suggest_cities)
+
         load_button = QPushButton("Load Weather")
         load_button.clicked.connect(self.update_city_weather)
 
@@ -130,45 +90,115 @@ class WeatherApp(QMainWindow):
         self.layout.addLayout(header_layout)
 
         # Decorative Image
-        weather_icon = QLabel()
-        pixmap = QPixmap("sun.png")
-        if not pixmap.isNull():
-            pixmap = pixmap.scaled(100, 100, Qt.KeepAspectRatio)
-            weather_icon.setPixmap(pixmap)
-        else:
-            weather_icon.setText("🌞")
-        self.layout.addWidget(weather_icon, alignment=Qt.AlignCenter)
+        self.weather_icon = QLabel()
+        self.show_weather_icon(self.weather_data)
+        self.layout.addWidget(self.weather_icon, alignment=Qt.AlignCenter)
 
-        # Chart Tabs
+        # Chart Tabs (last session's images until the real canvases are built)
         self.tabs = QTabWidget()
-        self.load_charts(self.weather_data)
+        self.charts = []
+        for chart_type, label in CHART_TABS:
+            placeholder = QLabel(alignment=Qt.AlignCenter)
+            image = self.snapshot['charts'].get(chart_type)
+            if image:
+                placeholder.setPixmap(QPixmap(image))
+            else:
+                placeholder.setText("Loading chart...")
+            self.tabs.addTab(placeholder, label)
         self.layout.addWidget(self.tabs)
 
         self.main_widget.setLayout(self.layout)
         self.setCentralWidget(self.main_widget)
 
+        # Span timings window, only when tracing is on
+        self.debug_panel = None
+        if TRACING:
+            QShortcut(QKeySequence("F12"), self, self.toggle_debug_panel)
+
+    def toggle_debug_panel(self):
+        if self.debug_panel is None:
+            from debug_panel import DebugPanel
+            self.debug_panel = DebugPanel()
+        self.debug_panel.setVisible(not self.debug_panel.isVisible())
+
+    @traced("app.show_weather_icon")
+    def show_weather_icon(self, weather_data):
+        # Pre-scaled, decoded once per process
+        icon = icon_for_weather(weather_data)
+        pixmap = icon_pixmap(icon, 100)
+        if not pixmap.isNull():
+            self.weather_icon.setPixmap(pixmap)
+        else:
+            self.weather_icon.setText(ICON_TEXT[icon])
+
+    @traced("app.load_charts")
     def load_charts(self, weather_data):
-        self.tabs.clear()
-        self.tabs.addTab(ChartCanvas('line', weather_data), "Temperature Line")
-        self.tabs.addTab(ChartCanvas('bar', weather_data), "Rainfall Bar")
-        self.tabs.addTab(ChartCanvas('area', weather_data), "Area Temp")
-        self.tabs.addTab(ChartCanvas('pie', weather_data), "Weather Type Pie")
-        self.tabs.addTab(ChartCanvas('nutrient'), "Soil Nutrients Pie")
+        # Before hydrate_charts the tabs are still snapshot images; it picks up
+        # self.weather_data when it runs
+        for canvas in self.charts:
+            if canvas.chart_type != 'nutrient':
+                canvas.set_weather_data(weather_data)
+
+    @traced("app.hydrate_charts")
+    def hydrate_charts(self):
+        # Swaps the snapshot placeholders for live canvases, once, after the first paint
+        if self.charts:
+            return
+        from garden_canvas import ChartCanvas
+
+        current = self.tabs.currentIndex()
+        for index, (chart_type, label) in enumerate(CHART_TABS):
+            canvas = ChartCanvas(chart_type, self.weather_data)
+            self.charts.append(canvas)
+            placeholder = self.tabs.widget(index)
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, canvas, label)
+            placeholder.deleteLater()
+        self.tabs.setCurrentIndex(current)
+
+    def suggest_cities(self, text):
+        self.city_suggestions.setStringList(suggest_cities(text))
 
     def update_city_weather(self):
         city = self.city_input.text()
         if city:
-            lat, lon = get_coordinates(city)
-            if lat and lon:
-                new_data = get_weather_data(lat, lon)
-                if new_data:
-                    self.weather_data = new_data
-                    self.load_charts(new_data)
-                    self.title.setText(f"🌤 Smart Garden - {city.title()}")
-                else:
-                    self.title.setText(f"⚠️ Weather not found for {city}")
-            else:
-                self.title.setText(f"⚠️ Invalid city: {city}")
+            self.title.setText(f"⏳ Loading {city}...")
+            self.loader.load_city(city)
+
+    def on_weather_loaded(self, city, new_data):
+        if city:
+            self.title.setText(f"🌤 Smart Garden - {city.title()}")
+        if self.loader.location and (city or self.location is None):
+            # A city load settles a new location; the startup refresh keeps the label it had
+            lat, lon = self.loader.location
+            self.location = {'city': city, 'lat': lat, 'lon': lon}
+        if new_data is not None and new_data.same_as(self.weather_data):
+            return  # e.g. the startup refresh of the cached forecast already on screen
+        with profiled("render"):
+            self.weather_data = new_data
+            self.show_weather_icon(new_data)
+            self.load_charts(new_data)
+
+    def on_weather_failed(self, city, reason):
+        if city is None:
+            return  # background refresh of the startup location; keep what is shown
+        if reason == "city":
+            self.title.setText(f"⚠️ Invalid city: {city}")
+        else:
+            self.title.setText(f"⚠️ Weather not found for {city}")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # Live charts load once the shell is on screen, whoever opened the window
+        if not self.charts:
+            QTimer.singleShot(0, self.hydrate_charts)
+
+    def closeEvent(self, event):
+        # What the next start-up shows before anything is loaded: the settled
+        # location, never a transient "Loading..." or error title
+        if self.charts and self.location:
+            save_snapshot(APP_NAME, self.location, self.charts)
+        super().closeEvent(event)
 
 # ------------------- RUN APP ------------------------
 
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+RECORDED_FORECAST = os.path.join(HERE, "recorded_forecast.json")
+
+# Runs in a fresh interpreter per measurement: prints a wall-clock stamp for the
+# shell window's first paint and once the live charts (which the window loads
+# itself after showing) have painted
+DRIVER = """
+import sys, time
+app_module = __import__(sys.argv[1])
+from PyQt5.QtCore import QEvent, QObject
+from PyQt5.QtWidgets import QApplication
+
+class FirstPaint(QObject):
+    stamp = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.stamp is None:
+            self.stamp = time.time()
+        return False
+
+app = QApplication(sys.argv)
+window = app_module.WeatherApp()
+first_paint = FirstPaint()
+window.installEventFilter(first_paint)
+window.show()
+while not window.charts or first_paint.stamp is None:
+    app.processEvents()
+for canvas in window.charts:
+    if canvas.isVisible():
+        canvas.flush_events()
+charts = time.time()
+print("shell", first_paint.stamp, flush=True)
+print("charts", charts, flush=True)
+if sys.argv[2] == "close":
+    window.close()
+"""
+
+def seed_cache(cache_dir):
+    # The recorded forecast as the last cached location, fresh, so no run touches the network
+    env = dict(os.environ, SMART_GARDEN_CACHE_DIR=cache_dir)
+    code = ("import json, sys; from forecast_cache import default_cache, cache_key; "
+            "from WEATHER import DAILY_VARS; data = json.load(open(sys.argv[1])); "
+            "default_cache().put(cache_key(28.61, 77.20, DAILY_VARS), data)")
+    subprocess.run([sys.executable, "-c", code, RECORDED_FORECAST], cwd=ROOT, env=env, check=True)
+
+def measure(app, env, close=False):
+    start = time.time()
+    proc = subprocess.run([sys.executable, "-c", DRIVER, app, "close" if close else "keep"],
+                          cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    stamps = dict(line.split() for line in proc.stdout.splitlines() if line.startswith(("shell", "charts")))
+    return {name: float(stamp) - start for name, stamp in stamps.items()}
+
+def main(argv=None):
+    sys.path.insert(0, ROOT)
+    from startup_snapshot import COLD_START_TARGET
+
+    parser = argparse.ArgumentParser(description="Cold-start time of the apps against the start-up target.")
+    parser.add_argument("apps", nargs="*", default=["WEATHER", "weather_garden"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the medians as JSON")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    failed = []
+    report = {}
+    with tempfile.TemporaryDirectory(prefix="garden-cold-") as cache_dir:
+        env["SMART_GARDEN_CACHE_DIR"] = cache_dir
+        seed_cache(cache_dir)
+        for app in args.apps:
+            # One run to leave a last-session snapshot behind, as a real user would
+            measure(app, env, close=True)
+            runs = [measure(app, env) for _ in range(args.runs)]
+            report[app] = {}
+            for phase, target in COLD_START_TARGET.items():
+                median = statistics.median(run[phase] for run in runs)
+                report[app][phase] = median
+                status = "ok" if median <= target else "OVER TARGET"
+                if median > target:
+                    failed.append(f"{app} {phase}")
+                if not args.json:
+                    print(f"{app:15s} {phase:6s} {median:6.2f} s (target {target:.1f} s) {status}")
+    if args.json:
+        print(json.dumps(report, indent=1))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
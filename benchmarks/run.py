@@ -0,0 +1,315 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+# Keep the benchmark's forecast cache away from the real one
+os.environ.setdefault("SMART_GARDEN_CACHE_DIR", tempfile.mkdtemp(prefix="garden-bench-"))
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+
+RESULTS_DIR = os.path.join(HERE, "results")
+RECORDED_FORECAST = os.path.join(HERE, "recorded_forecast.json")
+PLOT_COUNTS = (1, 100, 10000)
+HORIZONS = (5, 30, 365)
+REGRESSION = 1.10  # slower than this ratio against the baseline gets flagged
+DAILY_VARS = ("temperature_2m_max", "temperature_2m_min", "precipitation_sum")  # as the apps request
+
+# ------------------- REGISTRY -----------------------
+
+BENCHMARKS = []
+
+def benchmark(name):
+    # setup function returning the zero-argument callable to time
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+def measure(fn, repeat):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat, number)]
+    return {'min': min(times), 'median': statistics.median(times), 'number': number}
+
+# ------------------- STUB SERVER ------------------------
+
+class RecordedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = b""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub_server():
+    # Serves the recorded Open-Meteo response for every request
+    with open(RECORDED_FORECAST, "rb") as f:
+        RecordedHandler.body = f.read()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1/forecast"
+
+def recorded_forecast():
+    with open(RECORDED_FORECAST, encoding="utf-8") as f:
+        return json.load(f)
+
+# ------------------- SIMULATION ------------------------
+
+def rainfall(n_plots, days):
+    from pid_tuning import synthetic_rainfall
+
+    return synthetic_rainfall(n_plots, days, seed=0)
+
+@benchmark("PIDController.compute")
+def bench_pid_compute():
+    from weather import PIDController
+
+    pid = PIDController(0.8, 0.05, 0.1, 50.0)
+    return lambda: pid.compute(30.0)
+
+for _n in PLOT_COUNTS:
+    @benchmark(f"BatchPIDController.compute[{_n}]")
+    def bench_batch_pid(n=_n):
+        from weather import BatchPIDController
+
+        pid = BatchPIDController(0.8, 0.05, 0.1, np.full(n, 50.0))
+        current = np.full(n, 30.0)
+        return lambda: pid.compute(current)
+
+@benchmark("simulate_soil_moisture")
+def bench_simulate_soil_moisture():
+    from weather import simulate_soil_moisture
+
+    rain = rainfall(1, 5)[0].tolist()
+    return lambda: simulate_soil_moisture(rain)
+
+for _n in PLOT_COUNTS:
+    for _days in HORIZONS:
+        @benchmark(f"simulate_soil_moisture_batch[{_n}x{_days}]")
+        def bench_soil_batch(n=_n, days=_days):
+            from weather import simulate_soil_moisture_batch
+
+            rain = rainfall(n, days)
+            return lambda: simulate_soil_moisture_batch(rain)
+
+for _days in HORIZONS:
+    @benchmark(f"run_garden[{_days}]")
+    def bench_run_garden(days=_days):
+        from demo import run_garden
+
+        rain = rainfall(1, days)[0].tolist()
+        return lambda: run_garden(rain, days=days, verbose=False)
+
+@benchmark("simulate_garden[stub]")
+def bench_simulate_garden():
+    from demo import simulate_garden
+
+    devnull = open(os.devnull, "w")
+
+    def run():
+        # Forecast from the cache after the first call, like the app's repeat lookups;
+        # the per-day prints go to devnull so the terminal does not set the pace
+        with contextlib.redirect_stdout(devnull):
+            simulate_garden(None, (28.61, 77.20))
+    return run
+
+@benchmark("season[8760h]")
+def bench_season():
+    from season import SeasonSimulator
+
+    rain = np.repeat(rainfall(1, 365)[0] / 24, 24)
+    return lambda: SeasonSimulator().run(rain)
+
+for _burst in (64, 4096):
+    @benchmark(f"SensorRings.ingest[{_burst}]")
+    def bench_sensor_ingest(burst=_burst):
+        from sensor_ingest import READING, SensorRings
+
+        rings = SensorRings(10000)
+        readings = np.zeros(burst, READING)
+        readings['sensor'] = np.random.default_rng(0).integers(0, 10000, burst)
+        readings['moisture'] = 45.0
+        return lambda: rings.ingest(readings)
+
+# ------------------- FETCH AND PARSE ------------------------
+
+@benchmark("fetch_forecast[stub]")
+def bench_fetch_forecast():
+    from forecast_cache import fetch_forecast
+
+    # HTTP round trip to the local stub plus JSON decoding, no cache
+    return lambda: fetch_forecast(28.61, 77.20, DAILY_VARS)
+
+@benchmark("Forecast.from_json")
+def bench_forecast_from_json():
+    from forecast import Forecast
+
+    data = recorded_forecast()
+    return lambda: Forecast.from_json(data)
+
+@benchmark("load_forecast[cached]")
+def bench_load_forecast():
+    from forecast import load_forecast
+
+    # What the apps' get_weather_data does, minus their Qt imports: a cache hit
+    # plus the parsed-forecast lookup
+    load_forecast(28.61, 77.20, DAILY_VARS)
+    return lambda: load_forecast(28.61, 77.20, DAILY_VARS)
+
+# ------------------- RENDERING ------------------------
+
+def chart_benchmarks():
+    from garden_charts import CHART_STYLES
+
+    for chart_type in CHART_STYLES:
+        @benchmark(f"draw_chart[{chart_type}]")
+        def bench_first_draw(chart_type=chart_type):
+            # What every draw_chart call cost before artists were reused
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            from forecast import Forecast
+            from garden_charts import ChartPainter
+
+            forecast = Forecast.from_json(recorded_forecast())
+
+            def draw():
+                fig = Figure(figsize=(5, 4), dpi=100)
+                canvas = FigureCanvasAgg(fig)
+                painter = ChartPainter(fig, chart_type)
+                painter.update(forecast)
+                painter.render(canvas)
+            return draw
+
+        @benchmark(f"draw_chart_update[{chart_type}]")
+        def bench_update(chart_type=chart_type):
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            from forecast import Forecast
+            from garden_charts import ChartPainter
+
+            data = recorded_forecast()
+            other = json.loads(json.dumps(data))
+            other['daily']['precipitation_sum'] = other['daily']['precipitation_sum'][::-1]
+            forecasts = [Forecast.from_json(data), Forecast.from_json(other)]
+            fig = Figure(figsize=(5, 4), dpi=100)
+            canvas = FigureCanvasAgg(fig)
+            painter = ChartPainter(fig, chart_type)
+            painter.update(forecasts[0])
+            painter.render(canvas)
+            frame = [0]
+
+            def update():
+                frame[0] += 1
+                painter.update(forecasts[frame[0] % 2])
+                painter.render(canvas)
+            return update
+
+# ------------------- RESULTS ------------------------
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+def load_results(ref):
+    matches = sorted(glob.glob(os.path.join(RESULTS_DIR, f"{ref}*.json")))
+    if not matches:
+        sys.exit(f"no stored results for {ref!r} in {RESULTS_DIR}")
+    with open(matches[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+def report(results, baseline=None):
+    regressions = []
+    for name, result in results.items():
+        line = f"{name:42s} {result['median'] * 1e6:12.1f} µs"
+        old = baseline and baseline['results'].get(name)
+        if old:
+            # Best of the repeats is the least noisy figure to compare
+            ratio = result['min'] / old['min']
+            line += f"  x{ratio:5.2f}"
+            if ratio > REGRESSION:
+                line += "  SLOWER"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+# ------------------- MAIN ------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the fetch, simulate and render hot paths.")
+    parser.add_argument("-k", "--filter", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per benchmark")
+    parser.add_argument("--compare", metavar="COMMIT", help="compare against stored results of COMMIT")
+    parser.add_argument("--no-save", action="store_true", help="do not store the results")
+    args = parser.parse_args(argv)
+
+    import forecast_cache
+
+    server, url = start_stub_server()
+    forecast_cache.FORECAST_URL = url
+    chart_benchmarks()
+
+    results = {}
+    try:
+        for name, setup in BENCHMARKS:
+            if args.filter in name:
+                results[name] = measure(setup(), args.repeat)
+    finally:
+        server.shutdown()
+
+    commit, dirty = git_revision()
+    baseline = load_results(args.compare) if args.compare else None
+    regressions = report(results, baseline)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                'commit': commit,
+                'dirty': dirty,
+                'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'matplotlib': matplotlib.__version__,
+                'machine': platform.machine(),
+                'processor': platform.processor(),
+                'results': results,
+            }, f, indent=1)
+        print(f"saved {path}", file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) more than {REGRESSION:.2f}x slower", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from garden_cli import chunked, read_gardens
+
+# Headless chart reports: every chart of the app tabs, per site, to PNG/SVG on
+# the Agg canvas (no Qt). Each worker process keeps one template figure per
+# chart type and only swaps the next site's data into its artists
+# (ChartPainter.update), so a site costs the savefig calls and little else.
+
+REPORT_CHARTS = ('line', 'bar', 'area', 'pie', 'nutrient', 'soil')
+FIGSIZE = (5, 4)    # inches, same as the app's ChartCanvas
+DPI = 100
+PNG_COMPRESSION = 1  # zlib level; the default 6 costs more than drawing the chart
+CHUNK_SIZE = 50      # sites per worker task
+# Workers are replaced after this many chunks, so matplotlib's caches cannot grow without bound
+CHUNKS_PER_WORKER = 200
+SAFE_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")  # ids usable as a folder name as they are
+
+def site_dir_name(site_id, row):
+    # A site's folder under the report directory: its id when that is a plain
+    # name, else its input row, so no id can land outside the report or on
+    # another site's folder
+    if site_id is not None and SAFE_ID.fullmatch(str(site_id)):
+        return str(site_id)
+    return f"row-{row}"
+
+# ------------------- WORKERS -----------------------
+
+_templates = {}  # (chart_type, style) -> (figure, painter, footer text), per worker process
+_static = {}     # (chart_type, fmt) -> image bytes of charts that do not depend on the site
+
+def template_key(chart_type, style=None):
+    return chart_type, json.dumps(style, sort_keys=True)
+
+def template(chart_type, style=None):
+    key = template_key(chart_type, style)
+    if key not in _templates:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        from garden_charts import ChartPainter
+
+        fig = Figure(figsize=FIGSIZE, dpi=DPI)
+        FigureCanvasAgg(fig)
+        painter = ChartPainter(fig, chart_type, style)
+        footer = fig.text(0.01, 0.01, "", fontsize=7, color='gray')
+        _templates[key] = (fig, painter, footer)
+    return _templates[key]
+
+def render_image(chart_type, forecast, label, fmt, style=None):
+    fig, painter, footer = template(chart_type, style)
+    ok = False
+    try:
+        painter.update(forecast)
+        footer.set_text(label)
+        buffer = io.BytesIO()
+        kwargs = {'pil_kwargs': {'compress_level': PNG_COMPRESSION}} if fmt == "png" else {}
+        fig.savefig(buffer, format=fmt, **kwargs)
+        ok = True
+        return buffer.getvalue()
+    finally:
+        if not ok:
+            # A half-updated template must not carry over to the next site: drop
+            # it and its figure, the next site builds a fresh one
+            _templates.pop(template_key(chart_type, style), None)
+            fig.clear()
+
+def render_chunk(sites, out_dir, chart_types, formats, style=None):
+    # sites: [(site id, folder name, lat, lon, forecast JSON or None, error or None)]
+    # -> one manifest entry per site, in the same order
+    from forecast import Forecast
+
+    results = []
+    for site_id, dir_name, lat, lon, data, error in sites:
+        if error or not data:
+            results.append({'id': site_id, 'error': error or "no forecast"})
+            continue
+        files = []
+        # One bad site is recorded in the manifest and the chunk carries on
+        try:
+            forecast = Forecast.from_json(data)
+            label = f"{site_id}  ({lat:.2f}, {lon:.2f})  {forecast.dates[0]} - {forecast.dates[-1]}"
+            site_dir = os.path.join(out_dir, dir_name)
+            os.makedirs(site_dir, exist_ok=True)
+            for chart_type in chart_types:
+                for fmt in formats:
+                    if chart_type == 'nutrient':
+                        # Same simulated composition for every site: draw once per worker
+                        key = (chart_type, fmt)
+                        if key not in _static:
+                            _static[key] = render_image(chart_type, None, "", fmt, style)
+                        image = _static[key]
+                    else:
+                        image = render_image(chart_type, forecast, label, fmt, style)
+                    path = os.path.join(site_dir, f"{chart_type}.{fmt}")
+                    with open(path, "wb") as f:
+                        f.write(image)
+                    files.append(path)
+        except Exception as e:
+            results.append({'id': site_id, 'files': files, 'error': f"{type(e).__name__}: {e}"})
+            continue
+        results.append({'id': site_id, 'files': files})
+    return results
+
+# ------------------- MAIN ------------------------
+
+def run(args):
+    from fleet_fetcher import FleetFetcher
+    from forecast_cache import default_cache
+
+    fetcher = FleetFetcher(cache=default_cache())
+    os.makedirs(args.output, exist_ok=True)
+    manifest = open(os.path.join(args.output, "manifest.jsonl"), "w", encoding="utf-8")
+
+    start = time.perf_counter()
+    done = images = 0
+    # At most 2 chunks per worker in flight, so memory stays flat however many sites there are
+    max_inflight = 2 * args.workers
+    inflight = deque()
+
+    def collect():
+        nonlocal done, images
+        for result in inflight.popleft().result():
+            manifest.write(json.dumps(result) + "\n")
+            done += 1
+            images += len(result.get('files', ()))
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, max_tasks_per_child=CHUNKS_PER_WORKER) as pool:
+            for chunk in chunked(enumerate(read_gardens(args.input), 1), args.chunk_size):
+                # Sites that cannot be fetched keep their place and get a manifest error
+                located = [g for _, g in chunk if 'lat' in g and not g.get('error')]
+                forecasts = iter(fetcher.fetch([(g['lat'], g['lon']) for g in located]) if located else ())
+                sites = []
+                for row, g in chunk:
+                    if 'lat' in g and not g.get('error'):
+                        sites.append((g['id'], site_dir_name(g['id'], row), g['lat'], g['lon'],
+                                      next(forecasts), None))
+                    else:
+                        sites.append((g['id'], None, None, None, None, g.get('error') or "no coordinates"))
+                inflight.append(pool.submit(render_chunk, sites, args.output, args.charts, args.format))
+                while len(inflight) >= max_inflight:
+                    collect()
+            while inflight:
+                collect()
+    finally:
+        fetcher.close()
+        manifest.close()
+    elapsed = time.perf_counter() - start
+    print(f"{done} sites, {images} images in {elapsed:.1f} s ({images / elapsed if elapsed else 0:.0f} images/s)",
+          file=sys.stderr)
+    return done
+
+def main(argv=None):
+    from garden_charts import CHART_STYLES
+
+    parser = argparse.ArgumentParser(description="Render the garden charts of many sites to image files, headless.")
+    parser.add_argument("input", help="sites (.csv or .jsonl with id, lat, lon, as for garden_cli.py)")
+    parser.add_argument("-o", "--output", default="reports", help="report directory, one folder per site")
+    parser.add_argument("--charts", nargs="+", choices=list(CHART_STYLES), default=list(REPORT_CHARTS))
+    parser.add_argument("--format", nargs="+", choices=["png", "svg"], default=["png"])
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="sites per worker task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    run(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    main()
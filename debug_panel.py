@@ -0,0 +1,68 @@
+import os
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+)
+
+import instrumentation
+from forecast_cache import CACHE_DIR
+
+COLUMNS = ('count', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms')
+REFRESH_MS = 1000
+
+# Span timings of the running app (F12 when SMART_GARDEN_TRACE is set)
+class DebugPanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Timing spans")
+        self.resize(560, 360)
+        layout = QVBoxLayout()
+
+        self.table = QTableWidget(0, len(COLUMNS) + 1)
+        self.table.setHorizontalHeaderLabels(['span'] + [c.replace('_ms', ' ms') for c in COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.status = QLabel()
+        export_json = QPushButton("Export JSON")
+        export_json.clicked.connect(lambda: self.export("trace.json"))
+        export_prom = QPushButton("Export Prometheus")
+        export_prom.clicked.connect(lambda: self.export("trace.prom"))
+        reset = QPushButton("Reset")
+        reset.clicked.connect(instrumentation.reset)
+        buttons.addWidget(self.status)
+        buttons.addStretch()
+        for button in (export_json, export_prom, reset):
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(REFRESH_MS)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        spans = instrumentation.snapshot()
+        self.table.setRowCount(len(spans))
+        for row, (name, summary) in enumerate(spans.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for col, key in enumerate(COLUMNS, 1):
+                value = summary[key]
+                text = str(value) if key == 'count' else f"{value:.2f}"
+                self.table.setItem(row, col, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+
+    def export(self, name):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = instrumentation.export(os.path.join(CACHE_DIR, name))
+        self.status.setText(f"Saved {path}")
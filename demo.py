@@ -1,8 +1,10 @@
-import requests
 import numpy as np
 import matplotlib.pyplot as plt
 import time
 
+from forecast import load_forecast
+from instrumentation import traced
+
 # Constants
 SOIL_MOISTURE_THRESHOLD = 30  # Threshold for watering (in percentage)
 WATERING_AMOUNT = 20           # Amount of water to add (in percentage)
@@ -10,10 +12,9 @@ DAYS = 5                       # Number of days to simulate
 
 # Function to fetch weather data
 def fetch_weather_data(api_key, location):
-    url = f"http://api.open-meteo.com/v1/forecast?latitude={location[0]}&longitude={location[1]}&daily=precipitation_sum&timezone=auto"
-    response = requests.get(url)
-    data = response.json()
-    return data['daily']['precipitation_sum']
+    # None when the fetch failed and nothing is cached for the location
+    forecast = load_forecast(location[0], location[1], ("precipitation_sum",))
+    return None if forecast is None else forecast.precipitation
 
 # PID Controller for soil moisture
 class PIDController:
@@ -32,29 +33,43 @@ class PIDController:
         return self.Kp * error + self.Ki * self.integral + self.Kd * derivative
 
 # Simulate soil moisture over time
+@traced("sim.garden")
 def simulate_garden(api_key, location):
     precipitation = fetch_weather_data(api_key, location)
-    soil_moisture = 50  # Initial soil moisture percentage
+    if precipitation is None:
+        print("No weather data available for", location)
+        return None
+    moisture_history, _ = run_garden(precipitation)
+    return moisture_history
+
+# Same simulation for an already known precipitation series
+@traced("sim.demo")
+def run_garden(precipitation, initial_moisture=50, Kp=1.0, Ki=0.1, Kd=0.05, days=DAYS, verbose=True):
+    soil_moisture = initial_moisture  # Initial soil moisture percentage
     moisture_history = []
+    watering_history = []
 
-    pid = PIDController(Kp=1.0, Ki=0.1, Kd=0.05)
+    pid = PIDController(Kp=Kp, Ki=Ki, Kd=Kd)
 
-    for day in range(DAYS):
+    for day in range(days):
         # Update soil moisture based on precipitation
         soil_moisture += precipitation[day] - WATERING_AMOUNT if soil_moisture > SOIL_MOISTURE_THRESHOLD else 0
         moisture_history.append(soil_moisture)
 
         # Check if watering is needed
+        watering = 0
         if soil_moisture < SOIL_MOISTURE_THRESHOLD:
             watering = pid.compute(SOIL_MOISTURE_THRESHOLD, soil_moisture)
             soil_moisture += watering
-            print(f"Day {day + 1}: Watering needed. Added {watering:.2f}% water.")
+            if verbose:
+                print(f"Day {day + 1}: Watering needed. Added {watering:.2f}% water.")
+        watering_history.append(watering)
 
         # Simulate evaporation (decrease moisture)
         soil_moisture -= 5  # Simulate daily evaporation
         soil_moisture = max(0, soil_moisture)  # Ensure moisture doesn't go below 0
 
-    return moisture_history
+    return moisture_history, watering_history
 
 # Plotting the soil moisture curve
 def plot_soil_moisture(moisture_history):
@@ -72,4 +87,5 @@ if __name__ == "__main__":
     LOCATION = (35.6895, 139.6917)  # Example: Tokyo, Japan (latitude, longitude)
 
     moisture_history = simulate_garden(API_KEY, LOCATION)
-    plot_soil_moisture(moisture_history)
+    if moisture_history:
+        plot_soil_moisture(moisture_history)
@@ -0,0 +1,138 @@
+import numpy as np
+import requests
+
+from instrumentation import traced
+from weather import simulate_soil_moisture_batch
+
+ENSEMBLE_URL = "https://ensemble-api.open-meteo.com/v1/ensemble"
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Forecast error grows with lead time; these are the day-1 spreads
+RAIN_SIGMA = 0.5   # log-space spread of daily rainfall amounts
+TEMP_SIGMA = 1.0   # °C, random walk step of the max temperature error
+WET_CHANCE = 0.15  # chance a forecast dry day turns out wet
+DRY_RAIN = 3.0     # mean mm on such a surprise wet day
+
+# Share of soil moisture kept per day (0.85 in weather.py at 25 °C),
+# a little less on hot days and a little more on cool ones.
+# weather.py's model has no temperature term to derive this from: the slope is
+# an assumption, not a calibration. 0.005 per °C makes the daily loss
+# (1 - retention, 0.15 at 25 °C) grow about 3 % per °C, the order of the rise
+# of potential evaporation with temperature. 0 gives weather.py's fixed 0.85.
+BASE_RETENTION = 0.85
+REF_TEMP = 25.0
+RETENTION_PER_DEGREE = 0.005
+
+# ------------------- MEMBERS -----------------------
+
+def retention_from_temperature(temp_max):
+    temp_max = np.asarray(temp_max, dtype=float)
+    return np.clip(BASE_RETENTION - RETENTION_PER_DEGREE * (temp_max - REF_TEMP), 0.5, 0.99)
+
+def perturb_forecast(rainfall, temp_max=None, members=1000, seed=None):
+    # (members, T) rainfall and temperature series scattered around one deterministic forecast
+    rng = np.random.default_rng(seed)
+    rainfall = np.nan_to_num(np.asarray(rainfall, dtype=float))
+    n_days = len(rainfall)
+    lead = np.sqrt(np.arange(1, n_days + 1))
+
+    # Mean-preserving lognormal noise on the amounts, widening with lead time
+    sigma = RAIN_SIGMA * lead
+    noise = np.exp(rng.standard_normal((members, n_days)) * sigma - sigma ** 2 / 2)
+    rain = rainfall * noise
+    # Some forecast dry days get rain after all
+    surprise = (rainfall == 0) & (rng.random((members, n_days)) < WET_CHANCE * lead / lead[-1])
+    rain = np.where(surprise, rng.exponential(DRY_RAIN, (members, n_days)), rain)
+
+    temp = None
+    if temp_max is not None:
+        temp_max = np.nan_to_num(np.asarray(temp_max, dtype=float), nan=REF_TEMP)
+        # Errors on consecutive days are correlated, so walk rather than jitter
+        temp = temp_max + np.cumsum(rng.standard_normal((members, n_days)) * TEMP_SIGMA, axis=1)
+    return rain, temp
+
+def fetch_ensemble_members(lat, lon, model="icon_seamless", days=5):
+    # Daily (members, days) rainfall sums and max temperatures from the ensemble API
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": "precipitation,temperature_2m",
+        "models": model,
+        "forecast_days": days,
+        "timezone": "auto",
+    }
+    try:
+        response = requests.get(ENSEMBLE_URL, params=params, timeout=20)
+        if response.status_code != 200:
+            return None, None
+        hourly = response.json()["hourly"]
+    except (requests.RequestException, KeyError, ValueError) as e:
+        print("Ensemble fetch error:", e)
+        return None, None
+
+    def members(prefix):
+        # (members, days, 24), or None when the response has no usable series
+        keys = sorted(k for k in hourly if k == prefix or k.startswith(prefix + "_member"))
+        if not keys or any(not isinstance(hourly[k], list) or len(hourly[k]) < days * 24 for k in keys):
+            return None
+        series = np.array([[np.nan if v is None else v for v in hourly[k][:days * 24]] for k in keys], dtype=float)
+        return series.reshape(len(keys), days, 24)
+
+    rain, temp = members("precipitation"), members("temperature_2m")
+    if rain is None or temp is None:
+        print("Ensemble fetch error: no member series in the response")
+        return None, None
+    return np.nansum(rain, axis=2), np.nanmax(temp, axis=2)
+
+# ------------------- ENSEMBLE SIMULATION ------------------------
+
+@traced("sim.ensemble")
+def simulate_ensemble(rainfall_members, temp_members=None, initial_moisture=30.0,
+                      target_moisture=50.0, Kp=0.8, Ki=0.05, Kd=0.1, percentiles=PERCENTILES):
+    # rainfall_members: (members, T) for one plot or (plots, members, T); every
+    # trajectory goes through the batch engine in a single call
+    rain = np.asarray(rainfall_members, dtype=float)
+    single = rain.ndim == 2
+    if single:
+        rain = rain[None]
+    n_plots, n_members, n_days = rain.shape
+
+    retention = BASE_RETENTION
+    if temp_members is not None:
+        retention = retention_from_temperature(np.reshape(temp_members, rain.shape)).reshape(-1, n_days)
+
+    def per_member(value):
+        return np.repeat(np.broadcast_to(np.asarray(value, dtype=float), (n_plots,)), n_members)
+
+    moisture, watering = simulate_soil_moisture_batch(
+        rain.reshape(-1, n_days), per_member(initial_moisture), per_member(target_moisture),
+        per_member(Kp), per_member(Ki), per_member(Kd), retention)
+
+    moisture = moisture.reshape(n_plots, n_members, n_days + 1)
+    watering = watering.reshape(n_plots, n_members, n_days)
+    bands = {
+        'percentiles': list(percentiles),
+        # (plots, len(percentiles), T+1) and (plots, len(percentiles), T)
+        'moisture': np.percentile(moisture, percentiles, axis=1).transpose(1, 0, 2),
+        'watering': np.percentile(watering, percentiles, axis=1).transpose(1, 0, 2),
+    }
+    if single:
+        bands['moisture'] = bands['moisture'][0]
+        bands['watering'] = bands['watering'][0]
+    return bands
+
+def forecast_bands(forecast, members=1000, seed=0, **kwargs):
+    # Percentile bands for one forecast.Forecast, as drawn by the 'ensemble' chart
+    rain, temp = perturb_forecast(forecast.precipitation, forecast.temp_max, members, seed)
+    return simulate_ensemble(rain, temp, **kwargs)
+
+if __name__ == "__main__":
+    import time
+
+    rain, temp = perturb_forecast([0.0, 2.0, 0.0, 5.0, 0.0], [31, 29, 33, 27, 30], members=10000, seed=1)
+    start = time.perf_counter()
+    bands = simulate_ensemble(rain, temp)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"10000 members x 5 days in {elapsed:.1f} ms")
+    for p, row in zip(bands['percentiles'], bands['moisture']):
+        print(f"p{p:<3d} moisture", np.round(row, 1))
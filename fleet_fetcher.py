@@ -0,0 +1,157 @@
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from forecast_cache import COORD_DECIMALS, FORECAST_URL, cache_key
+
+DEFAULT_DAILY = ("temperature_2m_max", "temperature_2m_min", "precipitation_sum")
+# Open-Meteo accepts comma separated coordinate lists; keep URLs well under 8 KB
+BATCH_SIZE = 50
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# ------------------- RATE LIMITING -----------------------
+
+class RateLimiter:
+    # Token bucket shared by all worker threads
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# ------------------- FLEET FETCHER ------------------------
+
+class FleetFetcher:
+    def __init__(self, base_url=FORECAST_URL, daily=DEFAULT_DAILY, batch_size=BATCH_SIZE,
+                 max_workers=4, max_retries=3, backoff=0.5, rate_limit=5.0,
+                 timeout=15, cache=None):
+        self.base_url = base_url
+        self.daily = tuple(daily)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.limiter = RateLimiter(rate_limit)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # One keep-alive session, one pooled connection per worker
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.inflight = {}  # key -> Future, so concurrent callers share one request
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "locations": 0, "coalesced": 0, "cached": 0}
+
+    def fetch(self, coords):
+        # coords: iterable of (lat, lon); returns one forecast (or None) per entry, in order
+        coords = [(round(float(lat), COORD_DECIMALS), round(float(lon), COORD_DECIMALS))
+                  for lat, lon in coords]
+        futures = {}
+        to_fetch = []
+        with self.lock:
+            for lat, lon in coords:
+                key = cache_key(lat, lon, self.daily)
+                if key in futures:
+                    continue
+                if key in self.inflight:
+                    self.stats["coalesced"] += 1
+                    futures[key] = self.inflight[key]
+                    continue
+                future = Future()
+                cached = self.cache.fresh(lat, lon, self.daily) if self.cache else None
+                if cached is not None:
+                    self.stats["cached"] += 1
+                    future.set_result(cached)
+                else:
+                    self.inflight[key] = future
+                    to_fetch.append((key, lat, lon))
+                futures[key] = future
+
+        for start in range(0, len(to_fetch), self.batch_size):
+            self.executor.submit(self._fetch_batch, to_fetch[start:start + self.batch_size])
+
+        return [futures[cache_key(lat, lon, self.daily)].result() for lat, lon in coords]
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def _fetch_batch(self, batch):
+        # Every waiting future is resolved however this ends: None for sites the
+        # API left out or failed on, the exception if something else went wrong
+        results = [None] * len(batch)
+        error = None
+        try:
+            try:
+                data = self._request(batch)
+            except Exception as e:
+                print("Fleet fetch error:", e)
+            else:
+                results[:len(data)] = data[:len(batch)]
+            if self.cache is not None:
+                for (key, lat, lon), site in zip(batch, results):
+                    if site is not None:
+                        self.cache.put(key, site)
+        except Exception as e:
+            error = e
+        finally:
+            with self.lock:
+                waiting = [self.inflight.pop(key) for key, _, _ in batch]
+            for future, site in zip(waiting, results):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(site)
+
+    def _request(self, batch):
+        params = {
+            "latitude": ",".join(str(lat) for _, lat, _ in batch),
+            "longitude": ",".join(str(lon) for _, _, lon in batch),
+            "daily": ",".join(self.daily),
+            "timezone": "auto",
+        }
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            with self.lock:
+                self.stats["requests"] += 1
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code == 200:
+                    data = response.json()
+                    data = data if isinstance(data, list) else [data]
+                    with self.lock:
+                        self.stats["locations"] += len(data)
+                    return data
+                if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                    response.raise_for_status()
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    time.sleep(int(retry_after))
+                    continue
+            with self.lock:
+                self.stats["retries"] += 1
+            # Exponential backoff with jitter
+            time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+        return [None] * len(batch)
@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from forecast_cache import get_forecast
+from instrumentation import traced
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+# Per-day weather type, same thresholds as the pie chart
+CLOUDY, SUNNY, RAINY = 0, 1, 2
+SUNNY_TEMP = 30   # °C max temperature
+RAINY_RAIN = 5    # mm precipitation
+
+# ------------------- FORECAST -----------------------
+
+class Forecast:
+    # One daily Open-Meteo forecast as float64 columns (missing values are NaN),
+    # parsed once and shared read-only by the charts and simulators
+    __slots__ = ('latitude', 'longitude', 'dates', 'temp_max', 'temp_min', 'precipitation',
+                 'day_labels', 'sunny', 'rainy', 'weather_type', 'weather_counts')
+
+    def __init__(self, dates, temp_max=None, temp_min=None, precipitation=None,
+                 latitude=None, longitude=None):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        n_days = len(self.dates)
+        self.temp_max = column(temp_max, n_days)
+        self.temp_min = column(temp_min, n_days)
+        self.precipitation = column(precipitation, n_days)
+
+        # 1970-01-01 was a Thursday
+        weekday = (self.dates.astype(np.int64) + 3) % 7
+        self.day_labels = tuple(WEEKDAYS[d] for d in weekday)
+        self.sunny = self.temp_max > SUNNY_TEMP
+        self.rainy = self.precipitation > RAINY_RAIN
+        self.weather_type = np.where(self.rainy, RAINY, np.where(self.sunny, SUNNY, CLOUDY))
+        sunny, rainy = int(self.sunny.sum()), int(self.rainy.sum())
+        self.weather_counts = (sunny, max(n_days - sunny - rainy, 0), rainy)
+
+        for name in ('dates', 'temp_max', 'temp_min', 'precipitation', 'sunny', 'rainy', 'weather_type'):
+            getattr(self, name).flags.writeable = False
+
+    @classmethod
+    @traced("forecast.parse")
+    def from_json(cls, data):
+        daily = data['daily']
+        return cls(daily['time'], daily.get('temperature_2m_max'), daily.get('temperature_2m_min'),
+                   daily.get('precipitation_sum'), data.get('latitude'), data.get('longitude'))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def same_as(self, other):
+        # Same place and same values (NaN matching NaN), e.g. a refetch that changed nothing
+        if other is self:
+            return True
+        if other is None or (self.latitude, self.longitude) != (other.latitude, other.longitude):
+            return False
+        return all(np.array_equal(getattr(self, name), getattr(other, name), equal_nan=name != 'dates')
+                   for name in ('dates', 'temp_max', 'temp_min', 'precipitation'))
+
+def column(values, n_days):
+    if values is None:
+        return np.full(n_days, np.nan)
+    # None -> NaN through the float conversion
+    return np.array(values, dtype=float)
+
+# ------------------- LOADING ------------------------
+
+# Parsed forecasts keyed by the identity of the cached JSON they came from, so each
+# fetch is parsed once however many times the cache hands the same payload out
+_parsed = OrderedDict()
+_parsed_lock = threading.Lock()
+PARSED_ENTRIES = 128
+
+def parse_forecast(data):
+    if data is None:
+        return None
+    with _parsed_lock:
+        hit = _parsed.get(id(data))
+        if hit and hit[0] is data:
+            _parsed.move_to_end(id(data))
+            return hit[1]
+    forecast = Forecast.from_json(data)
+    with _parsed_lock:
+        _parsed[id(data)] = (data, forecast)
+        while len(_parsed) > PARSED_ENTRIES:
+            _parsed.popitem(last=False)
+    return forecast
+
+def load_forecast(lat, lon, daily):
+    return parse_forecast(get_forecast(lat, lon, daily))
@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import span
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+CACHE_DIR = os.environ.get(
+    "SMART_GARDEN_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "smart-garden"))
+
+# Open-Meteo re-runs its forecast models about once an hour, so a daily
+# forecast younger than that cannot have changed.
+FRESH_TTL = 60 * 60
+# Older entries are still served (and refreshed in the background) up to this age
+STALE_TTL = 6 * 60 * 60
+# 2 decimals ~ 1 km, finer than any of the forecast model grids
+COORD_DECIMALS = 2
+
+# ------------------- HTTP FETCH -----------------------
+
+def fetch_forecast(lat, lon, daily, timezone="auto"):
+    # Imported on first fetch: requests is a noticeable share of app start-up
+    import requests
+
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "daily": ",".join(daily),
+        "timezone": timezone,
+    }
+    try:
+        with span("forecast.http"):
+            response = requests.get(FORECAST_URL, params=params, timeout=10)
+        if response.status_code == 200:
+            with span("forecast.decode"):
+                return response.json()
+    except requests.RequestException as e:
+        print("Forecast fetch error:", e)
+    return None
+
+# ------------------- CACHE ------------------------
+
+def cache_key(lat, lon, daily):
+    lat = round(float(lat), COORD_DECIMALS)
+    lon = round(float(lon), COORD_DECIMALS)
+    return f"{lat:.{COORD_DECIMALS}f},{lon:.{COORD_DECIMALS}f}|{','.join(sorted(daily))}"
+
+
+class ForecastCache:
+    def __init__(self, path=None, max_entries=128, fresh_ttl=FRESH_TTL,
+                 stale_ttl=STALE_TTL, fetcher=fetch_forecast):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "forecasts.sqlite")
+        self.path = path
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.fetcher = fetcher
+        self.memory = OrderedDict()  # key -> (fetched_at, data), LRU order
+        self.refreshing = set()
+        # fresh() misses are kept apart: a caller that falls back to get() after one
+        # would otherwise count the same lookup as two misses
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "fresh_misses": 0,
+                      "refreshes": 0, "errors": 0}
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS forecasts "
+            "(key TEXT PRIMARY KEY, fetched_at REAL, payload TEXT)")
+        self.db.commit()
+
+    def get(self, lat, lon, daily):
+        key = cache_key(lat, lon, daily)
+        entry = self._lookup(key)
+        age = time.time() - entry[0] if entry else None
+
+        if entry and age < self.fresh_ttl:
+            self._count("hits")
+            return entry[1]
+
+        if entry and age < self.stale_ttl:
+            # Stale-while-revalidate: answer now, refresh behind the caller's back
+            self._count("stale_hits")
+            self._refresh_in_background(key, lat, lon, daily)
+            return entry[1]
+
+        self._count("misses")
+        data = self._fetch(key, lat, lon, daily)
+        if data is None and entry:
+            return entry[1]  # offline: an old forecast beats none
+        return data
+
+    def peek(self, lat, lon, daily):
+        # Whatever is cached, however old, without touching the network
+        entry = self._lookup(cache_key(lat, lon, daily))
+        return entry[1] if entry else None
+
+    def fresh(self, lat, lon, daily):
+        # Cached data still inside the fresh TTL, else None; never fetches
+        entry = self._lookup(cache_key(lat, lon, daily))
+        if entry and time.time() - entry[0] < self.fresh_ttl:
+            self._count("hits")
+            return entry[1]
+        self._count("fresh_misses")
+        return None
+
+    def latest(self, daily):
+        # Most recently fetched (lat, lon, data) for these variables, or None
+        suffix = "|" + ",".join(sorted(daily))
+        with self.lock:
+            row = self.db.execute(
+                "SELECT key, payload FROM forecasts WHERE substr(key, -?) = ? "
+                "ORDER BY fetched_at DESC LIMIT 1", (len(suffix), suffix)).fetchone()
+        if row is None:
+            return None
+        lat, lon = row[0].split("|")[0].split(",")
+        return float(lat), float(lon), json.loads(row[1])
+
+    def put(self, key, data, fetched_at=None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self.lock:
+            self._remember(key, (fetched_at, data))
+            self.db.execute(
+                "INSERT OR REPLACE INTO forecasts (key, fetched_at, payload) VALUES (?, ?, ?)",
+                (key, fetched_at, json.dumps(data)))
+            self.db.commit()
+
+    def _lookup(self, key):
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry:
+                self.memory.move_to_end(key)
+                return entry
+            row = self.db.execute(
+                "SELECT fetched_at, payload FROM forecasts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry = (row[0], json.loads(row[1]))
+            self._remember(key, entry)
+            return entry
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _fetch(self, key, lat, lon, daily):
+        lat = round(float(lat), COORD_DECIMALS)
+        lon = round(float(lon), COORD_DECIMALS)
+        data = self.fetcher(lat, lon, daily)
+        if data is None:
+            self._count("errors")
+            return None
+        self.put(key, data)
+        return data
+
+    def _refresh_in_background(self, key, lat, lon, daily):
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+            self.stats["refreshes"] += 1
+
+        def refresh():
+            try:
+                self._fetch(key, lat, lon, daily)
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+# ------------------- SHARED INSTANCE ------------------------
+
+_cache = None
+
+def default_cache():
+    global _cache
+    if _cache is None:
+        _cache = ForecastCache()
+    return _cache
+
+def get_forecast(lat, lon, daily):
+    return default_cache().get(lat, lon, daily)
+
+def cache_stats():
+    return dict(default_cache().stats)
@@ -0,0 +1,243 @@
+import numpy as np
+
+from forecast import parse_forecast
+from forecast_cache import COORD_DECIMALS
+from instrumentation import traced
+
+# Plots a few hundred metres apart get practically the same forecast, so rather
+# than one request per plot: fetch a coarse lattice of points around the plots
+# (through FleetFetcher, so batched and cached) and interpolate every plot's
+# series from its neighbours in one vectorized step.
+
+# Degrees between grid points (~5 km), around the forecast models' resolution.
+# Keep it a multiple of 10 ** -COORD_DECIMALS so grid points survive the rounding.
+GRID_SPACING = 0.05
+VARIABLES = ('temp_max', 'temp_min', 'precipitation')  # Forecast columns interpolated
+NEIGHBOURS = 4        # grid points blended per plot by inverse distance
+IDW_POWER = 2.0
+LEAF_SIZE = 16
+QUERY_BLOCK = 4096    # plots per KD-tree pass, bounds the (plots, leaves) distance matrix
+KM_PER_DEGREE = 111.2
+MIN_DISTANCE = 1e-6   # km; a plot on a grid point takes that point's series
+# Corner offsets of a grid cell, (lat, lon) steps, in bilinear weight order
+CORNERS = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+
+def to_km(lats, lons, origin_lat):
+    # Equirectangular around the field's latitude; fine from field to region scale
+    scale = np.cos(np.radians(origin_lat))
+    return np.column_stack([np.asarray(lats, dtype=float) * KM_PER_DEGREE,
+                            np.asarray(lons, dtype=float) * KM_PER_DEGREE * scale])
+
+# ------------------- KD-TREE -----------------------
+
+class KDTree:
+    # Median-split tree over 2-D points, kept as its leaves only: a query visits
+    # leaves nearest box first and stops once no unvisited box can hold a point
+    # closer than its k-th best so far. All queries of a block advance together.
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if not len(self.points):
+            raise ValueError("KDTree needs at least one point")
+        leaves = []
+        stack = [np.arange(len(self.points))]
+        while stack:
+            idx = stack.pop()
+            if len(idx) <= leaf_size:
+                leaves.append(idx)
+                continue
+            coords = self.points[idx]
+            axis = np.argmax(np.ptp(coords, axis=0))
+            order = np.argsort(coords[:, axis], kind="stable")
+            half = len(idx) // 2
+            stack += [idx[order[:half]], idx[order[half:]]]
+        # Leaves padded to leaf_size with -1 (no point)
+        self.members = np.full((len(leaves), leaf_size), -1)
+        self.box_low = np.empty((len(leaves), 2))
+        self.box_high = np.empty((len(leaves), 2))
+        for leaf, idx in enumerate(leaves):
+            self.members[leaf, :len(idx)] = idx
+            self.box_low[leaf] = self.points[idx].min(axis=0)
+            self.box_high[leaf] = self.points[idx].max(axis=0)
+
+    def __len__(self):
+        return len(self.points)
+
+    def query(self, x, k=1):
+        # x (N, 2) -> distances, indices, both (N, k) nearest first; -1 / inf past len(self)
+        x = np.asarray(x, dtype=float).reshape(-1, 2)
+        distances = np.empty((len(x), k))
+        indices = np.empty((len(x), k), dtype=np.int64)
+        for start in range(0, len(x), QUERY_BLOCK):
+            block = slice(start, start + QUERY_BLOCK)
+            distances[block], indices[block] = self._query(x[block], k)
+        return distances, indices
+
+    def _query(self, x, k):
+        # Distance from every query to every leaf box (0 inside), visited in that order
+        gap = (np.maximum(self.box_low[None] - x[:, None], 0)
+               + np.maximum(x[:, None] - self.box_high[None], 0))
+        box_distance = np.sqrt((gap ** 2).sum(axis=2))
+        visit = np.argsort(box_distance, axis=1)
+        box_distance = np.take_along_axis(box_distance, visit, axis=1)
+
+        best_distance = np.full((len(x), k), np.inf)
+        best_index = np.full((len(x), k), -1, dtype=np.int64)
+        active = np.arange(len(x))
+        for rank in range(len(self.members)):
+            active = active[box_distance[active, rank] < best_distance[active, -1]]
+            if not len(active):
+                break
+            candidates = self.members[visit[active, rank]]
+            distance = np.sqrt(((self.points[candidates] - x[active, None]) ** 2).sum(axis=2))
+            distance[candidates < 0] = np.inf
+            distance = np.concatenate([best_distance[active], distance], axis=1)
+            candidates = np.concatenate([best_index[active], candidates], axis=1)
+            order = np.argsort(distance, axis=1)[:, :k]
+            best_distance[active] = np.take_along_axis(distance, order, axis=1)
+            best_index[active] = np.take_along_axis(candidates, order, axis=1)
+        return best_distance, best_index
+
+# ------------------- INTERPOLATION ------------------------
+
+def blend(values, rows, weights):
+    # values (G, D), rows/weights (N, k) -> (N, D) weighted mean per plot; NaN
+    # (missing) grid values are left out, NaN only where all neighbours miss
+    neighbours = values[rows]
+    weights = np.where(np.isnan(neighbours), 0.0, weights[:, :, None])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (np.nan_to_num(neighbours) * weights).sum(axis=1) / weights.sum(axis=1)
+
+def idw_weights(tree, query, k=NEIGHBOURS, power=IDW_POWER):
+    # Inverse-distance weights over the k nearest tree points; rows index the tree's points
+    distance, rows = tree.query(query, k)
+    weights = np.where(rows < 0, 0.0, 1.0 / np.maximum(distance, MIN_DISTANCE) ** power)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return np.maximum(rows, 0), weights
+
+def bilinear_weights(lats, lons, spacing):
+    # Fractions of each plot across its grid cell -> weights of the cell's CORNERS
+    position = np.column_stack([lats, lons]) / spacing
+    frac = position - np.floor(position)
+    lat_frac, lon_frac = frac[:, :1], frac[:, 1:]
+    return np.hstack([(1 - lat_frac) * (1 - lon_frac), (1 - lat_frac) * lon_frac,
+                      lat_frac * (1 - lon_frac), lat_frac * lon_frac])
+
+class ForecastGrid:
+    # interpolate(lats, lons) -> (dates, {variable: (N, days)}) for N plots from
+    # the forecasts of the grid points around them
+    def __init__(self, fetcher, spacing=GRID_SPACING, neighbours=NEIGHBOURS, power=IDW_POWER):
+        # Finer than the cache's coordinate rounding, neighbouring grid points
+        # would collapse onto one cache key and one forecast
+        if not spacing >= 10 ** -COORD_DECIMALS:
+            raise ValueError(f"grid spacing {spacing} is finer than the cache's "
+                             f"{10 ** -COORD_DECIMALS:g} degree coordinate resolution")
+        # Off that resolution, grid points get rounded while the bilinear weights
+        # still use the exact spacing, so the weights would not fit the corners
+        steps = spacing * 10 ** COORD_DECIMALS
+        if abs(steps - round(steps)) > 1e-9:
+            raise ValueError(f"grid spacing {spacing} is not a multiple of the cache's "
+                             f"{10 ** -COORD_DECIMALS:g} degree coordinate resolution")
+        self.fetcher = fetcher
+        self.spacing = spacing
+        self.neighbours = neighbours
+        self.power = power
+        self.stats = {'plots': 0, 'grid_points': 0}
+
+    def grid_points(self, lats, lons):
+        # Corners of every grid cell holding a plot: (G, 2) degrees, plus each
+        # plot's four corner rows (N, 4) in CORNERS order
+        cells = np.floor(np.column_stack([lats, lons]) / self.spacing).astype(np.int64)
+        corners = (cells[:, None, :] + CORNERS[None]).reshape(-1, 2)
+        corners, rows = np.unique(corners, axis=0, return_inverse=True)
+        return np.round(corners * self.spacing, COORD_DECIMALS), rows.reshape(len(cells), 4)
+
+    @traced("grid.load")
+    def load(self, points):
+        # Forecast columns (G, days) of the grid points; valid marks points that
+        # came back with the same days as the rest (None if none came back)
+        forecasts = [parse_forecast(data) for data in self.fetcher.fetch(points.tolist())]
+        reference = next((f for f in forecasts if f is not None and len(f)), None)
+        if reference is None:
+            return None
+        columns = {name: np.full((len(points), len(reference)), np.nan) for name in VARIABLES}
+        valid = np.zeros(len(points), dtype=bool)
+        for row, forecast in enumerate(forecasts):
+            if forecast is not None and np.array_equal(forecast.dates, reference.dates):
+                valid[row] = True
+                for name in VARIABLES:
+                    columns[name][row] = getattr(forecast, name)
+        return reference.dates, columns, valid
+
+    @traced("grid.interpolate")
+    def interpolate(self, lats, lons, method="idw"):
+        lats = np.asarray(lats, dtype=float).ravel()
+        lons = np.asarray(lons, dtype=float).ravel()
+        points, corner_rows = self.grid_points(lats, lons)
+        self.stats['plots'] += len(lats)
+        self.stats['grid_points'] += len(points)
+        loaded = self.load(points)
+        if loaded is None:
+            return None
+        dates, columns, valid = loaded
+
+        width = max(4, self.neighbours)
+        rows = np.zeros((len(lats), width), dtype=np.int64)
+        weights = np.zeros((len(lats), width))
+        if method == "bilinear":
+            rows[:, :4] = corner_rows
+            weights[:, :4] = bilinear_weights(lats, lons, self.spacing)
+            # A plot with a corner that failed to load falls back to IDW
+            fallback = ~valid[corner_rows].all(axis=1)
+        elif method == "idw":
+            fallback = np.ones(len(lats), dtype=bool)
+        else:
+            raise ValueError(f"unknown interpolation method {method!r}")
+
+        if fallback.any():
+            loaded_rows = np.flatnonzero(valid)
+            origin = points[loaded_rows, 0].mean()
+            tree = KDTree(to_km(points[loaded_rows, 0], points[loaded_rows, 1], origin))
+            idw_rows, idw = idw_weights(tree, to_km(lats[fallback], lons[fallback], origin),
+                                        min(self.neighbours, len(tree)), self.power)
+            rows[fallback] = 0
+            weights[fallback] = 0.0
+            rows[fallback, :idw.shape[1]] = loaded_rows[idw_rows]
+            weights[fallback, :idw.shape[1]] = idw
+        return dates, {name: blend(columns[name], rows, weights) for name in VARIABLES}
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from fleet_fetcher import FleetFetcher
+    from forecast_cache import default_cache
+
+    parser = argparse.ArgumentParser(description="Interpolate forecasts for a dense field of plots from a coarse grid.")
+    parser.add_argument("lat", type=float)
+    parser.add_argument("lon", type=float)
+    parser.add_argument("--plots", type=int, default=5000, help="random plots within --radius degrees")
+    parser.add_argument("--radius", type=float, default=0.2)
+    parser.add_argument("--spacing", type=float, default=GRID_SPACING)
+    parser.add_argument("--method", choices=["idw", "bilinear"], default="idw")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lats = args.lat + rng.uniform(-args.radius, args.radius, args.plots)
+    lons = args.lon + rng.uniform(-args.radius, args.radius, args.plots)
+    fetcher = FleetFetcher(cache=default_cache())
+    grid = ForecastGrid(fetcher, args.spacing)
+    try:
+        start = time.perf_counter()
+        result = grid.interpolate(lats, lons, args.method)
+        elapsed = time.perf_counter() - start
+    finally:
+        fetcher.close()
+    if result is None:
+        raise SystemExit("No forecast for any grid point")
+    dates, columns = result
+    print(f"{args.plots} plots from {grid.stats['grid_points']} grid points "
+          f"({fetcher.stats['requests']} requests, {fetcher.stats['cached']} cached) in {elapsed:.2f} s")
+    rain = columns['precipitation']
+    for day, date in enumerate(dates):
+        print(f"{date}: rain {np.nanmin(rain[:, day]):5.1f} - {np.nanmax(rain[:, day]):5.1f} mm, "
+              f"max temp {np.nanmean(columns['temp_max'][:, day]):5.1f} °C mean")
@@ -0,0 +1,46 @@
+import os
+
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+from garden_charts import ChartPainter
+from instrumentation import traced
+
+# Imported by the apps only once their window is on screen: matplotlib and its
+# Qt backend are the bulk of start-up time.
+
+class ChartCanvas(FigureCanvas):
+    def __init__(self, chart_type, weather_data=None, style=None):
+        self.fig = Figure(figsize=(5, 4), dpi=100)
+        super().__init__(self.fig)
+        self.chart_type = chart_type
+        self.weather_data = weather_data
+        self.painter = ChartPainter(self.fig, chart_type, style)
+        # Rendering is deferred until the tab is actually on screen
+        self.needs_redraw = True
+
+    def set_weather_data(self, weather_data):
+        self.weather_data = weather_data
+        self.needs_redraw = True
+        if self.isVisible():
+            self.draw_chart()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.needs_redraw:
+            self.draw_chart()
+
+    @traced("chart.draw")
+    def draw_chart(self):
+        # Swaps new data into the existing artists; full redraw only when the layout changed
+        self.needs_redraw = False
+        self.painter.update(self.weather_data)
+        self.painter.render(self, idle=True)
+
+    def save_image(self, path):
+        # PNG of the chart as currently sized, for the next start-up's snapshot
+        if self.needs_redraw:
+            self.painter.update(self.weather_data)
+        tmp = f"{path}.tmp"
+        self.fig.savefig(tmp, format="png")
+        os.replace(tmp, path)
@@ -0,0 +1,299 @@
+import time
+
+import numpy as np
+
+# Target for one incremental chart update (artist data swap + blit): 60 fps
+FRAME_BUDGET_MS = 16.0
+
+NUTRIENTS = ['Nitrogen', 'Phosphorus', 'Potassium', 'Calcium', 'Magnesium', 'Sulfur']
+NUTRIENT_VALUES = [25, 20, 20, 10, 15, 10]  # Simulated %
+NUTRIENT_COLORS = ['#FF9999', '#66B3FF', '#99FF99', '#FFCC99', '#C2C2F0', '#FFD700']
+
+# Look of each chart type; apps pass overrides for their own variant
+CHART_STYLES = {
+    'line': {'title': "Temperature Range Over Days", 'ylabel': "Temperature (°C)",
+             'max_color': 'red', 'min_color': 'blue', 'band': 'lightpink', 'band_alpha': 0.5},
+    'bar': {'title': "Rainfall Forecast", 'ylabel': "Rainfall (mm)", 'color': 'deepskyblue'},
+    'area': {'title': "Area Chart - Max Temperature", 'ylabel': "Temperature (°C)",
+             'color': 'orange', 'alpha': 0.4},
+    'pie': {'title': "Weather Distribution", 'empty_text': "Not enough data"},
+    'nutrient': {'title': "Soil Nutrient Composition"},
+    'soil': {'title': "Simulated Soil Moisture", 'ylabel': "Soil Moisture Index", 'color': 'brown'},
+    'ensemble': {'title': "Soil Moisture Outlook", 'ylabel': "Soil Moisture (%)", 'color': 'green',
+                 'members': 1000, 'target': 50.0},
+}
+
+# Forecast columns each chart plots; a chart whose columns are all missing shows a message
+CHART_COLUMNS = {'line': ('temp_max', 'temp_min'), 'bar': ('rainfall',), 'area': ('temp_max',),
+                 'soil': ('rainfall',), 'ensemble': ('rainfall', 'temp_max')}
+
+# ------------------- HELPERS -----------------------
+
+def fill_verts(x, y_low, y_high):
+    # Polygon outline of fill_between(x, y_low, y_high)
+    return np.concatenate([np.column_stack([x, y_low]),
+                           np.column_stack([x[::-1], y_high[::-1]])])
+
+def finite_range(*columns):
+    # (min, max) over the finite values, NaN when a column set has none
+    values = np.concatenate([np.ravel(c) for c in columns]).astype(float)
+    values = values[np.isfinite(values)]
+    return (values.min(), values.max()) if len(values) else (np.nan, np.nan)
+
+# ------------------- CHART PAINTER ------------------------
+
+class ChartPainter:
+    # Owns one Axes and its artists. The first update builds them; later updates
+    # with the same number of days only swap data into the existing artists, and
+    # render() then blits those artists over a cached background.
+    def __init__(self, fig, chart_type, style=None):
+        self.fig = fig
+        self.ax = fig.add_subplot(111)
+        self.chart_type = chart_type
+        self.style = dict(CHART_STYLES.get(chart_type, {}))
+        self.style.update((style or {}).get(chart_type, {}))
+        self.artists = None
+        self.n_days = None
+        self.days = None
+        self.pie_values = None
+        self.last_update_ms = 0.0
+        self.background = None
+        self.needs_full_draw = True
+        self.canvas = None
+
+    def update(self, forecast):
+        # forecast: a forecast.Forecast (or None)
+        start = time.perf_counter()
+        if self.chart_type == 'nutrient':
+            if self.artists is None:
+                self._build_nutrient()
+        elif not forecast:
+            self._show_message("No weather data available")
+        else:
+            series = {
+                'temp_max': forecast.temp_max,
+                'temp_min': forecast.temp_min,
+                'rainfall': forecast.precipitation,
+                'counts': list(forecast.weather_counts),
+            }
+            days = forecast.day_labels
+            columns = CHART_COLUMNS.get(self.chart_type)
+            if columns and not np.isfinite(finite_range(*(series[c] for c in columns))).all():
+                self._show_message("No weather data available")
+            elif self.artists is None or len(days) != self.n_days:
+                self._build(days, series)
+            else:
+                if days != self.days:
+                    self.ax.set_xticks(range(len(days)), days)
+                    self.needs_full_draw = True
+                getattr(self, '_update_' + self.chart_type)(series)
+            self.days = days
+        self.last_update_ms = (time.perf_counter() - start) * 1000
+        return self.last_update_ms
+
+    def render(self, canvas, idle=False):
+        # Full draw when anything besides the data artists changed, else blit
+        if self.canvas is not canvas:
+            self.canvas = canvas
+            canvas.mpl_connect('draw_event', self._on_draw)
+            self.needs_full_draw = True
+        if self.needs_full_draw or self.background is None or not canvas.supports_blit:
+            self.needs_full_draw = False
+            if idle:
+                canvas.draw_idle()
+            else:
+                canvas.draw()
+            return
+        canvas.restore_region(self.background)
+        self._draw_animated()
+        canvas.blit(self.fig.bbox)
+
+    def _on_draw(self, event):
+        # Background without the animated data artists, then paint them on top.
+        # savefig() draws animated artists itself, so leave those draws alone.
+        if event.canvas is not self.canvas or self.canvas.is_saving():
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self._animated():
+            self.ax.draw_artist(artist)
+
+    def _animated(self):
+        if not self.artists:
+            return []
+        animated = []
+        for artist in self.artists.values():
+            animated.extend(artist if self.chart_type == 'bar' else [artist])
+        return sorted(animated, key=lambda artist: artist.get_zorder())
+
+    def _show_message(self, text):
+        self.ax.clear()
+        self.ax.text(0.5, 0.5, text, ha='center', va='center')
+        self.artists = None
+        self.n_days = None
+        self.needs_full_draw = True
+
+    def _build(self, days, series):
+        ax = self.ax
+        ax.clear()
+        self.artists = {}
+        self.n_days = len(days)
+        self.x = np.arange(len(days), dtype=float)
+        getattr(self, '_build_' + self.chart_type)(series)
+        if self.chart_type != 'pie':
+            ax.set_xticks(range(len(days)), days)
+            ax.set_title(self.style['title'])
+            ax.set_ylabel(self.style['ylabel'])
+            # Data artists are left out of full draws and blitted over the background
+            for artist in self._animated():
+                artist.set_animated(True)
+        self.needs_full_draw = True
+
+    def _rescale(self, low, high):
+        if not (np.isfinite(low) and np.isfinite(high)):
+            # The plotted column is missing altogether; set_ylim would reject NaN
+            self._show_message("No weather data available")
+            return
+        # Only touch the limits when the new data leaves them or shrinks a lot
+        ymin, ymax = self.ax.get_ylim()
+        if low >= ymin and high <= ymax and (high - low) >= 0.5 * (ymax - ymin):
+            return
+        pad = 0.05 * (high - low) or 1.0
+        self.ax.set_ylim(low - pad, high + pad)
+        self.needs_full_draw = True
+
+    # --- line ---
+    def _build_line(self, series):
+        s, ax, x = self.style, self.ax, self.x
+        self.artists['max'], = ax.plot(x, series['temp_max'], marker='o', label='Max Temp', color=s['max_color'])
+        self.artists['min'], = ax.plot(x, series['temp_min'], marker='o', label='Min Temp', color=s['min_color'])
+        if s.get('band'):
+            self.artists['band'] = ax.fill_between(x, series['temp_min'], series['temp_max'],
+                                                   color=s['band'], alpha=s['band_alpha'])
+        ax.legend()
+
+    def _update_line(self, series):
+        self.artists['max'].set_ydata(series['temp_max'])
+        self.artists['min'].set_ydata(series['temp_min'])
+        if 'band' in self.artists:
+            self.artists['band'].set_verts([fill_verts(self.x, series['temp_min'], series['temp_max'])])
+        self._rescale(*finite_range(series['temp_min'], series['temp_max']))
+
+    # --- bar ---
+    def _build_bar(self, series):
+        self.artists['bars'] = self.ax.bar(self.x, series['rainfall'], color=self.style['color'])
+
+    def _update_bar(self, series):
+        for patch, height in zip(self.artists['bars'], series['rainfall']):
+            patch.set_height(height)
+        low, high = finite_range(series['rainfall'])
+        self._rescale(min(0.0, low), high)
+
+    # --- area ---
+    def _build_area(self, series):
+        s = self.style
+        self.artists['area'] = self.ax.fill_between(self.x, series['temp_max'], color=s['color'], alpha=s['alpha'])
+
+    def _update_area(self, series):
+        self.artists['area'].set_verts([fill_verts(self.x, np.zeros_like(self.x), series['temp_max'])])
+        low, high = finite_range(series['temp_max'])
+        self._rescale(min(0.0, low), high)
+
+    # --- pie ---
+    def _build_pie(self, series):
+        ax = self.ax
+        values = series['counts']
+        self.pie_values = values
+        if sum(values) == 0:
+            ax.text(0.5, 0.5, self.style['empty_text'], ha='center', va='center')
+        else:
+            ax.pie(values, labels=['Sunny', 'Cloudy', 'Rainy'],
+                   autopct='%1.1f%%', colors=['orange', 'gray', 'blue'])
+            ax.set_title(self.style['title'])
+
+    def _update_pie(self, series):
+        # Wedge geometry and labels all depend on the counts; rebuild only when they change
+        values = series['counts']
+        if values != self.pie_values:
+            self.ax.clear()
+            self._build_pie(series)
+            self.needs_full_draw = True
+
+    # --- nutrient ---
+    def _build_nutrient(self):
+        ax = self.ax
+        ax.clear()
+        ax.pie(NUTRIENT_VALUES, labels=NUTRIENTS, autopct='%1.1f%%', colors=NUTRIENT_COLORS, startangle=140)
+        ax.set_title(self.style['title'])
+        self.artists = {}
+        self.needs_full_draw = True
+
+    # --- soil ---
+    def _build_soil(self, series):
+        # Simulated soil moisture using cumulative rainfall
+        self.artists['soil'], = self.ax.plot(self.x, np.cumsum(series['rainfall']),
+                                             marker='s', color=self.style['color'])
+
+    def _update_soil(self, series):
+        soil_moisture = np.cumsum(series['rainfall'])
+        self.artists['soil'].set_ydata(soil_moisture)
+        self._rescale(*finite_range(soil_moisture))
+
+    # --- ensemble ---
+    def _ensemble_bands(self, series):
+        from ensemble import perturb_forecast, simulate_ensemble
+
+        # Fixed seed: the same forecast always draws the same bands
+        rain, temp = perturb_forecast(series['rainfall'], series['temp_max'], self.style['members'], seed=0)
+        bands = simulate_ensemble(rain, temp, target_moisture=self.style['target'])
+        return bands['moisture'][:, 1:]  # moisture at the end of each day
+
+    def _build_ensemble(self, series):
+        s, ax, x = self.style, self.ax, self.x
+        p5, p25, p50, p75, p95 = self._ensemble_bands(series)
+        self.artists['outer'] = ax.fill_between(x, p5, p95, color=s['color'], alpha=0.15, label='5-95%')
+        self.artists['inner'] = ax.fill_between(x, p25, p75, color=s['color'], alpha=0.3, label='25-75%')
+        self.artists['median'], = ax.plot(x, p50, marker='o', color=s['color'], label='Median')
+        ax.axhline(y=s['target'], color='blue', linestyle='--', label='Target Moisture')
+        ax.set_ylim(0, 100)
+        ax.legend(loc='lower right')
+
+    def _update_ensemble(self, series):
+        p5, p25, p50, p75, p95 = self._ensemble_bands(series)
+        self.artists['outer'].set_verts([fill_verts(self.x, p5, p95)])
+        self.artists['inner'].set_verts([fill_verts(self.x, p25, p75)])
+        self.artists['median'].set_ydata(p50)
+
+# ------------------- FRAME TIME CHECK ------------------------
+
+if __name__ == "__main__":
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from forecast import Forecast
+
+    def sample(shift):
+        return Forecast.from_json({'daily': {
+            'time': ['2025-06-0%d' % d for d in range(1, 8)],
+            'temperature_2m_max': [31 + shift, 28, 25, 33, 29, 30, 27],
+            'temperature_2m_min': [20, 19 - shift, 18, 22, 21, 20, 19],
+            'precipitation_sum': [0, 6 + shift, 2, 0, 8, 0, 1],
+        }})
+
+    for chart_type in CHART_STYLES:
+        fig = Figure(figsize=(5, 4), dpi=100)
+        canvas = FigureCanvasAgg(fig)
+        painter = ChartPainter(fig, chart_type)
+        painter.update(sample(0))
+        painter.render(canvas)
+        frames = []
+        for i in range(50):
+            start = time.perf_counter()
+            painter.update(sample(i % 3))
+            painter.render(canvas)
+            frames.append((time.perf_counter() - start) * 1000)
+        median = sorted(frames)[len(frames) // 2]
+        status = "ok" if median <= FRAME_BUDGET_MS else "OVER BUDGET"
+        print(f"{chart_type:9s} median frame {median:6.2f} ms (budget {FRAME_BUDGET_MS:.0f} ms) {status}")
@@ -0,0 +1,277 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from forecast import parse_forecast
+from forecast_grid import GRID_SPACING, ForecastGrid
+
+# Per-garden parameters and their defaults for each model
+MODEL_DEFAULTS = {
+    # weather.py simulate_soil_moisture
+    'soil': {'initial_moisture': 30.0, 'target_moisture': 50.0, 'Kp': 0.8, 'Ki': 0.05, 'Kd': 0.1},
+    # demo.py simulate_garden (target is the fixed SOIL_MOISTURE_THRESHOLD there)
+    'demo': {'initial_moisture': 50.0, 'target_moisture': 30.0, 'Kp': 1.0, 'Ki': 0.1, 'Kd': 0.05},
+    # mpc_planner.py simulate_mpc_batch (gains are ignored)
+    'mpc': {'initial_moisture': 30.0, 'target_moisture': 50.0, 'Kp': 0.0, 'Ki': 0.0, 'Kd': 0.0},
+}
+PARAMS = ('initial_moisture', 'target_moisture', 'Kp', 'Ki', 'Kd')
+
+# ------------------- INPUT -----------------------
+
+def read_gardens(path):
+    # Streams garden dicts from a .csv or .jsonl file ("-" reads JSONL from stdin)
+    if path == "-":
+        f = sys.stdin
+    else:
+        f = open(path, newline="", encoding="utf-8")
+    try:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield parse_garden(row)
+        else:
+            for number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield error_garden(None, f"bad JSON on line {number}: {e.msg}")
+                        continue
+                    if not isinstance(row, dict):
+                        yield error_garden(None, f"line {number} is not a JSON object")
+                        continue
+                    yield parse_garden(row)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def error_garden(garden_id, error):
+    # A row that cannot be simulated; it comes out as an error row in its place
+    garden = {'id': garden_id, 'rainfall': None, 'error': error}
+    garden.update((name, None) for name in PARAMS)
+    return garden
+
+def parse_garden(row):
+    # Unreadable fields make the row an error row (first problem wins), never a crash
+    garden = {'id': row.get('id')}
+    lat, lon = row.get('lat'), row.get('lon')
+    if lat not in (None, "") or lon not in (None, ""):
+        try:
+            garden['lat'] = float(lat)
+            garden['lon'] = float(lon)
+        except (TypeError, ValueError):
+            garden.pop('lat', None)
+            garden['error'] = f"bad coordinates lat={lat!r} lon={lon!r}"
+    for name in PARAMS:
+        value = row.get(name)
+        try:
+            garden[name] = None if value in (None, "") else float(value)
+        except (TypeError, ValueError):
+            garden[name] = None
+            garden.setdefault('error', f"bad {name} {value!r}")
+    rainfall = row.get('rainfall')
+    if isinstance(rainfall, str):
+        rainfall = [r for r in rainfall.split(";") if r.strip()] or None
+    try:
+        garden['rainfall'] = clean_series(rainfall)
+    except (TypeError, ValueError):
+        garden['rainfall'] = None
+        garden.setdefault('error', f"bad rainfall series {rainfall!r}")
+    return garden
+
+def clean_series(values):
+    # Missing values count as no rain
+    if values is None:
+        return None
+    return [float(v) if v not in (None, "") else 0.0 for v in values]
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+# ------------------- FORECASTS ------------------------
+
+def attach_forecasts(chunk, fetcher, grid=None):
+    # Fills in rainfall for gardens that did not bring their own series
+    missing = [g for g in chunk if g['rainfall'] is None and 'lat' in g]
+    if missing and grid is not None:
+        # Interpolated from the forecast grid points around the gardens
+        result = grid.interpolate([g['lat'] for g in missing], [g['lon'] for g in missing])
+        if result is not None:
+            for garden, rainfall in zip(missing, np.nan_to_num(result[1]['precipitation']).tolist()):
+                garden['rainfall'] = rainfall
+    elif missing:
+        forecasts = fetcher.fetch([(g['lat'], g['lon']) for g in missing])
+        for garden, data in zip(missing, forecasts):
+            if data:
+                rainfall = parse_forecast(data).precipitation
+                garden['rainfall'] = np.nan_to_num(rainfall).tolist()
+    return chunk
+
+# ------------------- SIMULATION (worker processes) ------------------------
+
+def garden_error(garden, days):
+    if garden.get('error'):
+        return garden['error']
+    if garden['rainfall'] is None:
+        return "no rainfall series"
+    if len(garden['rainfall']) < days:
+        return f"rainfall series has {len(garden['rainfall'])} days, need {days}"
+    return None
+
+def simulate_chunk(chunk, model, days):
+    # Results come back in input order, error rows in place
+    results = [None] * len(chunk)
+    ok, slots = [], []
+    for i, g in enumerate(chunk):
+        error = garden_error(g, days)
+        if error:
+            results[i] = {'id': g['id'], 'error': error}
+        else:
+            ok.append(g)
+            slots.append(i)
+    if not ok:
+        return results
+    defaults = MODEL_DEFAULTS[model]
+    for g in ok:
+        for name in PARAMS:
+            if g[name] is None:
+                g[name] = defaults[name]
+
+    if model == "demo":
+        from demo import run_garden
+
+        for i, g in zip(slots, ok):
+            moisture, watering = run_garden(g['rainfall'], g['initial_moisture'],
+                                            g['Kp'], g['Ki'], g['Kd'], days=days, verbose=False)
+            # Starting level first, like the soil model's moisture rows
+            moisture = [g['initial_moisture']] + moisture
+            results[i] = {'id': g['id'], 'watering': [round(w, 2) for w in watering],
+                          'moisture': [round(m, 2) for m in moisture]}
+        return results
+
+    # Whole chunk in one vectorized pass
+    rainfall = np.array([g['rainfall'][:days] for g in ok], dtype=float)
+    if model == "mpc":
+        from mpc_planner import simulate_mpc_batch
+
+        moisture, watering = simulate_mpc_batch(
+            rainfall,
+            np.array([g['initial_moisture'] for g in ok]),
+            np.array([g['target_moisture'] for g in ok]),
+        )
+        moisture = np.round(moisture, 2)
+        for i, g, m, w in zip(slots, ok, moisture.tolist(), watering.tolist()):
+            results[i] = {'id': g['id'], 'watering': w, 'moisture': m}
+        return results
+
+    from weather import simulate_soil_moisture_batch
+
+    moisture, watering = simulate_soil_moisture_batch(
+        rainfall,
+        np.array([g['initial_moisture'] for g in ok]),
+        np.array([g['target_moisture'] for g in ok]),
+        np.array([g['Kp'] for g in ok]),
+        np.array([g['Ki'] for g in ok]),
+        np.array([g['Kd'] for g in ok]),
+    )
+    moisture = np.round(moisture, 2)
+    for i, g, m, w in zip(slots, ok, moisture.tolist(), watering.tolist()):
+        results[i] = {'id': g['id'], 'watering': w, 'moisture': m}
+    return results
+
+# ------------------- OUTPUT ------------------------
+
+class ScheduleWriter:
+    def __init__(self, f, fmt):
+        self.f = f
+        self.fmt = fmt
+        if fmt == "csv":
+            self.writer = csv.writer(f)
+            self.writer.writerow(['id', 'day', 'watering', 'moisture', 'error'])
+
+    def write(self, results):
+        for result in results:
+            if self.fmt == "jsonl":
+                self.f.write(json.dumps(result) + "\n")
+            elif 'error' in result:
+                self.writer.writerow([result['id'], "", "", "", result['error']])
+            else:
+                for day, (w, m) in enumerate(zip(result['watering'], result['moisture'][1:]), 1):
+                    self.writer.writerow([result['id'], day, w, m, ""])
+
+# ------------------- MAIN ------------------------
+
+def run(args):
+    from fleet_fetcher import FleetFetcher
+    from forecast_cache import default_cache
+
+    fetcher = FleetFetcher(daily=("precipitation_sum",), cache=default_cache())
+    grid = None
+    if args.grid:
+        grid = ForecastGrid(fetcher, args.grid)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    writer = ScheduleWriter(out, fmt)
+
+    start = time.perf_counter()
+    done = 0
+    # At most 2 chunks per worker in flight, so memory stays flat however long the input is
+    max_inflight = 2 * args.workers
+    inflight = deque()
+    warned = False
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for chunk in chunked(read_gardens(args.input), args.chunk_size):
+                if args.model == "demo" and not warned and any(g['target_moisture'] is not None for g in chunk):
+                    print("target_moisture is ignored by --model demo (fixed 30% threshold)", file=sys.stderr)
+                    warned = True
+                attach_forecasts(chunk, fetcher, grid)
+                inflight.append(pool.submit(simulate_chunk, chunk, args.model, args.days))
+                while len(inflight) >= max_inflight:
+                    results = inflight.popleft().result()
+                    writer.write(results)
+                    done += len(results)
+            while inflight:
+                results = inflight.popleft().result()
+                writer.write(results)
+                done += len(results)
+    finally:
+        fetcher.close()
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed else float("inf")
+    print(f"{done} gardens in {elapsed:.2f} s ({rate:,.0f} gardens/s)", file=sys.stderr)
+    return done
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate watering schedules for many gardens, headless.")
+    parser.add_argument("input", help="garden definitions (.csv or .jsonl, '-' for JSONL on stdin)")
+    parser.add_argument("-o", "--output", default="-", help="schedule output file (default stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="output format (default from file name)")
+    parser.add_argument("--model", choices=["soil", "demo", "mpc"], default="soil",
+                        help="soil: weather.py PID model (vectorized); demo: demo.py threshold model, "
+                             "which waters below its fixed 30%% threshold and ignores target_moisture; "
+                             "mpc: mpc_planner.py forecast-aware planner (vectorized), ignores Kp/Ki/Kd")
+    parser.add_argument("--days", type=int, default=5, help="days to simulate")
+    parser.add_argument("--grid", type=float, nargs="?", const=GRID_SPACING, metavar="DEGREES",
+                        help="interpolate forecasts from a grid with this spacing instead of one per garden")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="gardens per worker task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    run(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    main()
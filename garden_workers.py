@@ -0,0 +1,114 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from forecast_cache import default_cache
+from geocoder import get_coordinates
+from instrumentation import profiled
+
+# ------------------- BACKGROUND WEATHER LOADING -----------------------
+
+class WeatherLoader(QObject):
+    # (label, weather data) for the newest request only
+    loaded = pyqtSignal(object, object)
+    # (label, "city" | "weather") when geocoding or the forecast fetch failed
+    failed = pyqtSignal(object, str)
+    # Emitted from worker threads; delivered on the GUI thread
+    job_done = pyqtSignal(int, object, object, object)
+
+    def __init__(self, fetch_weather, parent=None):
+        super().__init__(parent)
+        self.fetch_weather = fetch_weather
+        self.pool = QThreadPool.globalInstance()
+        self.request_id = 0
+        self.pending = None
+        # (lat, lon) of the last forecast emitted by loaded
+        self.location = None
+        # Every started job until its job_done arrives: with auto-delete off, a
+        # superseded job that is still running must not depend on its own frame
+        self.jobs = {}
+        self.job_done.connect(self._on_job_done)
+
+    def load_city(self, city):
+        self._start(WeatherJob(self, self._next_id(), city, None, None))
+
+    def load_location(self, lat, lon, label=None):
+        self._start(WeatherJob(self, self._next_id(), label, lat, lon))
+
+    def is_current(self, request_id):
+        return request_id == self.request_id
+
+    def _next_id(self):
+        # A newer request supersedes whatever is still queued or running
+        self.request_id += 1
+        if self.pending is not None and self.pool.tryTake(self.pending):
+            # Taken off the queue before it ran, so no job_done will come for it
+            self.jobs.pop(self.pending.request_id, None)
+        return self.request_id
+
+    def _start(self, job):
+        self.pending = job
+        self.jobs[job.request_id] = job
+        self.pool.start(job)
+
+    def _on_job_done(self, request_id, label, data, error):
+        # Answers to superseded requests are dropped here, on the GUI thread
+        job = self.jobs.pop(request_id, None)
+        if not self.is_current(request_id):
+            return
+        self.pending = None
+        if error:
+            self.failed.emit(label, error)
+        else:
+            self.location = (job.lat, job.lon) if job else None
+            self.loaded.emit(label, data)
+
+
+class WeatherJob(QRunnable):
+    def __init__(self, loader, request_id, city, lat, lon):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.request_id = request_id
+        self.city = city
+        self.lat = lat
+        self.lon = lon
+
+    def run(self):
+        with profiled("fetch"):
+            try:
+                self._run()
+            except Exception as e:
+                # An exception escaping QRunnable.run aborts the whole app under
+                # PyQt5; report it as a failed load instead
+                print("Weather load error:", e)
+                self.loader.job_done.emit(self.request_id, self.city, None, "weather")
+
+    def _run(self):
+        loader = self.loader
+        lat, lon = self.lat, self.lon
+        if lat is None:
+            lat, lon = get_coordinates(self.city)
+            if lat is None or lon is None:
+                loader.job_done.emit(self.request_id, self.city, None, "city")
+                return
+            self.lat, self.lon = lat, lon
+        if not loader.is_current(self.request_id):
+            # Superseded: still report back so the loader lets go of this job
+            loader.job_done.emit(self.request_id, self.city, None, None)
+            return
+        data = loader.fetch_weather(lat, lon)
+        loader.job_done.emit(self.request_id, self.city, data, None if data else "weather")
+
+# ------------------- STARTUP DATA ------------------------
+
+def startup_location(daily, snapshot):
+    # ({'city', 'lat', 'lon'}, cached data or None) to paint before anything loads:
+    # the location the last session settled on, else the most recently fetched
+    # forecast; (None, None) on a first start
+    cache = default_cache()
+    if snapshot['lat'] is not None:
+        location = {'city': snapshot['city'], 'lat': snapshot['lat'], 'lon': snapshot['lon']}
+        return location, cache.peek(location['lat'], location['lon'], daily)
+    cached = cache.latest(daily)
+    if cached is None:
+        return None, None
+    return {'city': None, 'lat': cached[0], 'lon': cached[1]}, cached[2]
@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import threading
+import unicodedata
+
+from forecast_cache import CACHE_DIR
+from instrumentation import traced
+
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+BUNDLED_GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.tsv")
+
+# ------------------- NAME NORMALISATION -----------------------
+
+def normalize(name):
+    # "  São  Paulo " -> "sao paulo": strip accents, fold case, squash spaces
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+# ------------------- GAZETTEER LOADING -----------------------
+
+def read_gazetteer(path):
+    # Accepts the bundled cities.tsv or a full GeoNames dump (cities15000.txt etc.)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) >= 19:  # GeoNames: id, name, ascii, alt, lat, lon, ..., cc, ..., population
+                name, ascii_name, alternates = cols[1], cols[2], cols[3]
+                lat, lon, country, population = cols[4], cols[5], cols[8], cols[14]
+            else:
+                name, ascii_name, alternates, lat, lon, country, population = cols[:7]
+            names = {name, ascii_name}
+            names.update(a for a in alternates.split(",") if a)
+            yield name, names, float(lat), float(lon), country, int(population or 0)
+
+# ------------------- INDEX ------------------------
+
+class Gazetteer:
+    def __init__(self, path=None, source=BUNDLED_GAZETTEER):
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, "places.sqlite")
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS places "
+            "(key TEXT, name TEXT, country TEXT, lat REAL, lon REAL, population INTEGER, "
+            "UNIQUE (key, name, country))")
+        # Sorted index on the normalised key: exact and prefix lookups are a b-tree seek
+        self.db.execute("CREATE INDEX IF NOT EXISTS places_key ON places (key, population DESC)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+        if source and os.path.exists(source):
+            self._load_if_changed(source)
+
+    def _load_if_changed(self, source):
+        stamp = f"{os.path.abspath(source)}:{os.path.getmtime(source)}"
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (source,)).fetchone()
+        if row and row[0] == stamp:
+            return
+        self.load(source)
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (source, stamp))
+            self.db.commit()
+
+    def load(self, source):
+        rows = []
+        for name, names, lat, lon, country, population in read_gazetteer(source):
+            for alias in names:
+                rows.append((normalize(alias), name, country, lat, lon, population))
+        self.add_rows(rows)
+
+    def add_rows(self, rows):
+        with self.lock:
+            # Same-named places in one country share a row; the most populous one
+            # keeps it, whatever order the source lists them in
+            self.db.executemany(
+                "INSERT INTO places VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (key, name, country) DO UPDATE SET "
+                "lat = excluded.lat, lon = excluded.lon, population = excluded.population "
+                "WHERE excluded.population >= places.population", rows)
+            self.db.commit()
+
+    def add(self, query, name, lat, lon, country="", population=0):
+        keys = {normalize(query), normalize(name)}
+        self.add_rows([(key, name, country, lat, lon, population) for key in keys])
+
+    def lookup(self, city_name, country=None):
+        key = normalize(city_name)
+        with self.lock:
+            if country:
+                return self.db.execute(
+                    "SELECT lat, lon FROM places WHERE key = ? AND country = ? "
+                    "ORDER BY population DESC LIMIT 1", (key, country)).fetchone()
+            return self.db.execute(
+                "SELECT lat, lon FROM places WHERE key = ? "
+                "ORDER BY population DESC LIMIT 1", (key,)).fetchone()
+
+    def prefix(self, text, limit=10):
+        key = normalize(text)
+        if not key:
+            return []
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT name, country, MAX(population) FROM places "
+                "WHERE key >= ? AND key < ? GROUP BY name, country "
+                "ORDER BY MAX(population) DESC LIMIT ?",
+                (key, key + "\uffff", limit)).fetchall()
+        return [f"{name}, {country}" if country else name for name, country, _ in rows]
+
+# ------------------- REMOTE FALLBACK ------------------------
+
+def fetch_coordinates(city_name, country=None):
+    import requests
+
+    params = {"name": city_name, "count": 1}
+    if country:
+        params["countryCode"] = country
+    try:
+        response = requests.get(GEOCODING_URL, params=params, timeout=10)
+        if response.status_code == 200:
+            data = response.json()
+            if "results" in data and data["results"]:
+                return data["results"][0]
+    except requests.RequestException as e:
+        print("Geocoding error:", e)
+    return None
+
+_gazetteer = None
+
+def default_gazetteer():
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
+
+def split_country(text):
+    # "Paris, US" (as suggest_cities lists places) -> ("Paris", "US"); without a
+    # two-letter country code at the end -> (part before the first comma, None)
+    name = text.split(",")[0].strip()
+    _, comma, suffix = text.rpartition(",")
+    suffix = suffix.strip()
+    if comma and len(suffix) == 2 and suffix.isalpha():
+        return name, suffix.upper()
+    return name, None
+
+@traced("geocoder.get_coordinates")
+def get_coordinates(city_name):
+    city_name, country = split_country(city_name)
+    gazetteer = default_gazetteer()
+    hit = gazetteer.lookup(city_name, country)
+    if hit:
+        return hit
+
+    result = fetch_coordinates(city_name, country)
+    if result is None:
+        return None, None
+    lat, lon = result["latitude"], result["longitude"]
+    gazetteer.add(city_name, result.get("name", city_name), lat, lon,
+                  result.get("country_code", ""), result.get("population") or 0)
+    return lat, lon
+
+def suggest_cities(text, limit=10):
+    return default_gazetteer().prefix(text, limit)
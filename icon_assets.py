@@ -0,0 +1,72 @@
+import hashlib
+import os
+from functools import lru_cache
+
+from forecast_cache import CACHE_DIR
+from instrumentation import traced
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+ICONS = {
+    'sun': os.path.join(ASSET_DIR, "sun.png"),
+    'rain': os.path.join(ASSET_DIR, "rain.png"),
+    'cloud': os.path.join(ASSET_DIR, "cloud.png"),
+}
+# Shown instead when an image is missing
+ICON_TEXT = {'sun': "🌞", 'rain': "🌧", 'cloud': "☁"}
+ICON_CACHE_DIR = os.path.join(CACHE_DIR, "icons")
+
+# ------------------- ICON CHOICE -----------------------
+
+def icon_for_weather(forecast):
+    # Today's weather type, classified like the pie chart (forecast.Forecast)
+    if not forecast:
+        return 'sun'
+    return ('cloud', 'sun', 'rain')[forecast.weather_type[0]]
+
+# ------------------- SCALED VARIANTS ------------------------
+
+@lru_cache(maxsize=None)
+def _source_hash(source, mtime, size):
+    # mtime/size in the cache key so an edited source gets rehashed
+    digest = hashlib.sha1()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+@traced("icon.scale")
+def scaled_icon(source, size):
+    # Path of a PNG no bigger than size x size, generated once per source version
+    source = ICONS.get(source, source)
+    if not os.path.exists(source):
+        return None
+    stat = os.stat(source)
+    digest = _source_hash(source, stat.st_mtime, stat.st_size)
+    name = os.path.splitext(os.path.basename(source))[0]
+    target = os.path.join(ICON_CACHE_DIR, f"{name}-{digest}-{size}.png")
+    if not os.path.exists(target):
+        from PIL import Image
+
+        os.makedirs(ICON_CACHE_DIR, exist_ok=True)
+        with Image.open(source) as image:
+            image.thumbnail((size, size), Image.LANCZOS)
+            tmp = f"{target}.{os.getpid()}.tmp"
+            image.save(tmp, format="PNG", optimize=True)
+        os.replace(tmp, target)
+    return target
+
+# ------------------- DECODED ICONS (once per process) ------------------------
+
+@lru_cache(maxsize=None)
+def icon_pixmap(source, size):
+    from PyQt5.QtGui import QPixmap
+
+    path = scaled_icon(source, size)
+    return QPixmap(path) if path else QPixmap()
+
+@lru_cache(maxsize=None)
+def icon_image(source, size):
+    import matplotlib.image as mpimg
+
+    path = scaled_icon(source, size)
+    return mpimg.imread(path) if path else None
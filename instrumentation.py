@@ -0,0 +1,183 @@
+import atexit
+import cProfile
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Off unless SMART_GARDEN_TRACE is set when the process starts; traced()
+# then hands back the undecorated function, so the hot paths pay nothing.
+ENABLED = bool(os.environ.get("SMART_GARDEN_TRACE"))
+# Written at exit (.prom/.txt for Prometheus text format, anything else JSON)
+TRACE_FILE = os.environ.get("SMART_GARDEN_TRACE_FILE")
+# One cProfile dump per user action lands here when set
+PROFILE_DIR = os.environ.get("SMART_GARDEN_PROFILE")
+
+ROLLING = 1024  # recent durations kept per span for the percentiles
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+
+# ------------------- HISTOGRAMS -----------------------
+
+class SpanStats:
+    __slots__ = ('count', 'total', 'max', 'recent', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=ROLLING)
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def summary(self):
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(p / 100 * len(recent)))] if recent else 0.0
+        return {
+            'count': self.count,
+            'total_s': self.total,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': percentile(50) * 1000,
+            'p90_ms': percentile(90) * 1000,
+            'p99_ms': percentile(99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+_spans = {}
+_lock = threading.Lock()
+
+def record(name, seconds):
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = SpanStats()
+        stats.add(seconds)
+
+def reset():
+    with _lock:
+        _spans.clear()
+
+# ------------------- SPANS ------------------------
+
+class Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = NullSpan()
+
+def span(name):
+    # with span("forecast.decode"): ...
+    return Span(name) if ENABLED else NULL_SPAN
+
+def traced(name):
+    # @traced("geocoder.get_coordinates") on a function or method
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+# ------------------- EXPORT ------------------------
+
+def snapshot():
+    with _lock:
+        return {name: stats.summary() for name, stats in sorted(_spans.items())}
+
+def to_prometheus():
+    lines = [
+        "# HELP smart_garden_span_seconds Time spent in instrumented code paths.",
+        "# TYPE smart_garden_span_seconds histogram",
+    ]
+    with _lock:
+        for name, stats in sorted(_spans.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f'smart_garden_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'smart_garden_span_seconds_bucket{{span="{name}",le="+Inf"}} {stats.count}')
+            lines.append(f'smart_garden_span_seconds_sum{{span="{name}"}} {stats.total:.6f}')
+            lines.append(f'smart_garden_span_seconds_count{{span="{name}"}} {stats.count}')
+    return "\n".join(lines) + "\n"
+
+def export(path):
+    if path.endswith((".prom", ".txt")):
+        text = to_prometheus()
+    else:
+        text = json.dumps(snapshot(), indent=1)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return path
+
+if ENABLED and TRACE_FILE:
+    atexit.register(export, TRACE_FILE)
+
+# ------------------- PROFILING ------------------------
+
+_profile_lock = threading.Lock()
+_profile_number = itertools.count(1)
+
+@contextmanager
+def profiled(action):
+    # cProfile around one user action when SMART_GARDEN_PROFILE is set; only one
+    # capture runs at a time, overlapping actions just go unprofiled
+    if not PROFILE_DIR or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. an outer cProfile run) is already active
+            profiler = None
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            name = f"{action}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_profile_number)}.prof"
+            profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+        _profile_lock.release()
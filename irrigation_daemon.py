@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from forecast import parse_forecast
+from forecast_cache import COORD_DECIMALS, FRESH_TTL
+from garden_cli import MODEL_DEFAULTS, PARAMS, parse_garden, read_gardens
+from weather import simulate_soil_moisture_batch
+
+POLL_INTERVAL = FRESH_TTL  # Open-Meteo's model update cadence
+# Seconds for hashing + re-simulating after one poll. Advisory: a slower re-plan
+# still completes, it is logged and counted in stats['over_budget']
+REPLAN_BUDGET = 0.5
+COMMAND_HISTORY = 100000   # watering commands kept for /commands?since=
+DEFAULT_PORT = 8765
+
+# ------------------- ZONES -----------------------
+
+class Zone:
+    __slots__ = ('id', 'lat', 'lon', 'params', 'params_digest', 'rainfall', 'start', 'rain_digest',
+                 'input_hash', 'plan')
+
+    def __init__(self, garden):
+        defaults = MODEL_DEFAULTS['soil']
+        self.id = str(garden['id'])
+        self.lat = round(garden['lat'], COORD_DECIMALS)
+        self.lon = round(garden['lon'], COORD_DECIMALS)
+        self.params = tuple(defaults[name] if garden[name] is None else garden[name] for name in PARAMS)
+        self.params_digest = digest(np.asarray(self.params, dtype=float).tobytes())
+        self.rainfall = None
+        self.start = None  # first forecast day of rainfall
+        self.rain_digest = b""
+        self.input_hash = None
+        self.plan = None
+
+    def content_hash(self):
+        # Everything the simulation depends on; equal hash -> same plan. The
+        # rainfall part is hashed once per location and shared by its zones.
+        return self.params_digest + self.rain_digest
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+# ------------------- SCHEDULER ------------------------
+
+class IrrigationScheduler:
+    # Keeps a watering plan per zone. Every poll fetches the forecasts of all
+    # zone locations, but only zones whose inputs hash differently are simulated
+    # again and get a new watering command.
+    def __init__(self, zones=(), fetcher=None, poll_interval=POLL_INTERVAL, budget=REPLAN_BUDGET):
+        self.zones = {}
+        self.fetcher = fetcher
+        self.poll_interval = poll_interval
+        self.budget = budget
+        self.commands = deque(maxlen=COMMAND_HISTORY)
+        self.seq = 0
+        self.subscribers = set()
+        self.stats = {'polls': 0, 'zones_changed': 0, 'zones_unchanged': 0,
+                      'last_replan_s': 0.0, 'over_budget': 0, 'fetch_errors': 0}
+        for garden in zones:
+            self.add_zone(garden)
+
+    def add_zone(self, garden):
+        zone = Zone(garden)
+        old = self.zones.get(zone.id)
+        if old is not None and (old.lat, old.lon) == (zone.lat, zone.lon):
+            zone.rainfall, zone.start, zone.rain_digest = old.rainfall, old.start, old.rain_digest
+            zone.input_hash = old.input_hash
+            zone.plan = old.plan
+        self.zones[zone.id] = zone
+        return zone
+
+    def locations(self, zones=None):
+        # zones grouped by forecast location, so shared locations are fetched once
+        groups = {}
+        for zone in self.zones.values() if zones is None else zones:
+            groups.setdefault((zone.lat, zone.lon), []).append(zone)
+        return groups
+
+    def changed(self, zones):
+        # Zones whose inputs hash differently from when they were last planned
+        changed = []
+        for zone in zones:
+            input_hash = zone.content_hash()
+            if input_hash != zone.input_hash:
+                zone.input_hash = input_hash
+                changed.append(zone)
+        self.stats['zones_unchanged'] += len(zones) - len(changed)
+        return changed
+
+    def apply_forecasts(self, groups, forecasts):
+        # New rainfall per location; returns the zones whose inputs changed
+        updated = []
+        for zones, data in zip(groups.values(), forecasts):
+            if not data:
+                self.stats['fetch_errors'] += 1
+                continue
+            forecast = parse_forecast(data)
+            rainfall = np.nan_to_num(forecast.precipitation)
+            start = str(forecast.dates[0]) if len(forecast) else None
+            rain_digest = digest(str(start).encode() + rainfall.tobytes())
+            for zone in zones:
+                zone.rainfall, zone.start, zone.rain_digest = rainfall, start, rain_digest
+            updated.extend(zones)
+        return self.changed(updated)
+
+    def replan(self, zones):
+        # One vectorized simulation over all changed zones (grouped by horizon)
+        by_days = {}
+        for zone in zones:
+            if zone.rainfall is not None and len(zone.rainfall):
+                by_days.setdefault(len(zone.rainfall), []).append(zone)
+        commands = []
+        for entries in by_days.values():
+            params = np.array([zone.params for zone in entries])
+            moisture, watering = simulate_soil_moisture_batch(
+                np.stack([zone.rainfall for zone in entries]),
+                params[:, 0], params[:, 1], params[:, 2], params[:, 3], params[:, 4])
+            moisture = np.round(moisture, 2)
+            for zone, m, w in zip(entries, moisture.tolist(), watering.tolist()):
+                zone.plan = {'zone': zone.id, 'start': zone.start, 'watering': w, 'moisture': m}
+                commands.append(self.emit(zone.id, zone.start, w[0]))
+        self.stats['zones_changed'] += len(commands)
+        return commands
+
+    def emit(self, zone_id, day, amount):
+        self.seq += 1
+        command = {'seq': self.seq, 'zone': zone_id, 'day': day, 'amount': amount, 'issued_at': time.time()}
+        self.commands.append(command)
+        for queue in self.subscribers:
+            queue.put_nowait(command)
+        return command
+
+    def commands_since(self, seq):
+        if not self.commands or seq >= self.commands[-1]['seq']:
+            return []
+        # seq numbers are contiguous, so the start can be computed
+        first = self.commands[0]['seq']
+        return list(self.commands)[max(0, seq + 1 - first):]
+
+    # ------------------- ASYNC LOOP ------------------------
+
+    async def poll(self, zones=None):
+        groups = self.locations(zones)
+        loop = asyncio.get_running_loop()
+        # FleetFetcher blocks on its own thread pool; keep it off the event loop
+        forecasts = await loop.run_in_executor(None, self.fetcher.fetch, list(groups))
+        start = time.perf_counter()
+        commands = self.replan(self.apply_forecasts(groups, forecasts))
+        elapsed = time.perf_counter() - start
+        self.stats['polls'] += 1
+        self.stats['last_replan_s'] = elapsed
+        if elapsed > self.budget:
+            self.stats['over_budget'] += 1
+            print(f"Re-plan took {elapsed:.3f} s (budget {self.budget:.3f} s)")
+        return commands
+
+    async def run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print("Poll error:", e)
+            await asyncio.sleep(self.poll_interval)
+
+# ------------------- HTTP API ------------------------
+
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    body = await reader.readexactly(length) if length else b""
+    return method, urlparse(target), body
+
+def write_response(writer, status, payload):
+    body = json.dumps(payload).encode()
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}[status]
+    writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+
+class ApiServer:
+    # GET  /zones/<id>          current plan of one zone
+    # POST /zones               add or update a zone (garden_cli JSON fields), re-planned at once
+    # GET  /commands?since=N    watering commands after sequence number N
+    # GET  /commands/stream     newline-delimited JSON, one line per new command
+    # GET  /stats
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        # The event loop keeps only weak references to tasks; hold them until done
+        self.tasks = set()
+
+    def spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def handle(self, reader, writer):
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            method, url, body = request
+            parts = [p for p in url.path.split("/") if p]
+            if method == "GET" and parts == ["commands", "stream"]:
+                await self.stream(writer)
+                return
+            status, payload = self.route(method, parts, parse_qs(url.query), body)
+            write_response(writer, status, payload)
+            await writer.drain()
+        except (ValueError, KeyError, TypeError) as e:
+            write_response(writer, 400, {'error': str(e) or type(e).__name__})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def route(self, method, parts, query, body):
+        scheduler = self.scheduler
+        if method == "GET" and parts == ["stats"]:
+            return 200, dict(scheduler.stats, zones=len(scheduler.zones), seq=scheduler.seq)
+        if method == "GET" and parts == ["commands"]:
+            since = int(query.get('since', ['0'])[0])
+            return 200, scheduler.commands_since(since)
+        if method == "GET" and len(parts) == 2 and parts[0] == "zones":
+            zone = scheduler.zones.get(parts[1])
+            if zone is None:
+                return 404, {'error': "unknown zone"}
+            return 200, zone.plan or {'zone': zone.id, 'pending': True}
+        if method == "POST" and parts == ["zones"]:
+            garden = json.loads(body)
+            if not isinstance(garden, dict):
+                raise ValueError("zone must be a JSON object")
+            garden = parse_garden(garden)
+            if garden.get('error'):
+                raise ValueError(garden['error'])
+            zone = scheduler.add_zone(garden)
+            if zone.rainfall is None:
+                # New location: fetch it now rather than at the next poll
+                self.spawn(scheduler.poll([zone]))
+            else:
+                scheduler.replan(scheduler.changed([zone]))
+            return 200, zone.plan or {'zone': zone.id, 'pending': True}
+        return 404, {'error': "not found"}
+
+    async def stream(self, writer):
+        queue = asyncio.Queue()
+        self.scheduler.subscribers.add(queue)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+            while True:
+                command = await queue.get()
+                writer.write(json.dumps(command).encode() + b"\n")
+                await writer.drain()
+        finally:
+            self.scheduler.subscribers.discard(queue)
+
+# ------------------- MAIN ------------------------
+
+async def serve(scheduler, host, port):
+    server = await asyncio.start_server(ApiServer(scheduler).handle, host, port)
+    print(f"Serving on http://{host}:{port}, {len(scheduler.zones)} zones")
+    async with server:
+        await asyncio.gather(server.serve_forever(), scheduler.run())
+
+def main(argv=None):
+    from fleet_fetcher import FleetFetcher
+    from forecast_cache import default_cache
+
+    parser = argparse.ArgumentParser(description="Irrigation scheduler: re-plans zones when their forecast changes.")
+    parser.add_argument("zones", help="zone definitions (.csv or .jsonl, as for garden_cli.py)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL, help="seconds between forecast polls")
+    args = parser.parse_args(argv)
+
+    zones = [g for g in read_gardens(args.zones) if 'lat' in g and not g.get('error')]
+    fetcher = FleetFetcher(daily=("precipitation_sum",), cache=default_cache())
+    scheduler = IrrigationScheduler(zones, fetcher, args.poll)
+    try:
+        asyncio.run(serve(scheduler, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fetcher.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import numpy as np
+
+from instrumentation import traced
+from weather import round_watering
+
+# Receding-horizon alternative to the PID controllers: each day, plan watering
+# for the next `horizon` days against the rain forecast, apply day one, repeat.
+#
+# Model (weather.py's, without the 100 % cap): m[t+1] = retention * m[t] + rain[t] + w[t]
+# so moisture is linear in the watering plan: m = A @ w + b.
+# Cost per plot: sum (m - target)^2 + water_cost * sum w
+#                + bound_weight * (sum max(0, low - m)^2 + sum max(0, m - high)^2)
+# subject to 0 <= w <= max_daily and sum w <= budget over the horizon.
+# Solved for all plots at once with FISTA (accelerated projected gradient).
+
+HORIZON = 5          # days planned ahead, same as the 5-day simulators
+RETENTION = 0.85     # share of moisture kept per day, as in weather.py
+MOISTURE_BOUNDS = (40.0, 70.0)  # % band the plan should stay inside
+MAX_DAILY = 40.0     # watering units one zone can deliver per day
+WATER_COST = 0.5     # cost of one unit of water, in squared % of tracking error
+BOUND_WEIGHT = 10.0  # extra weight on leaving MOISTURE_BOUNDS
+ITERATIONS = 200
+TOLERANCE = 1e-4     # a plot stops once no day of its plan moves by more than this (water units)
+
+# ------------------- MODEL -----------------------
+
+def dynamics(horizon, retention=RETENTION):
+    # A[t, s] = retention ** (t - s) for s <= t: effect of watering on day s on moisture after day t
+    t = np.arange(horizon)
+    power = t[:, None] - t[None, :]
+    return np.where(power >= 0, retention ** np.maximum(power, 0), 0.0)
+
+def free_response(moisture, rainfall, retention=RETENTION):
+    # Moisture after each day with no watering: (N, H)
+    n_plots, horizon = rainfall.shape
+    b = np.empty((n_plots, horizon))
+    current = moisture
+    for day in range(horizon):
+        current = current * retention + rainfall[:, day]
+        b[:, day] = current
+    return b
+
+# ------------------- PROJECTION ------------------------
+
+def project(w, max_daily, budget):
+    # Row-wise Euclidean projection onto {0 <= w <= max_daily, sum(w) <= budget}
+    w = np.clip(w, 0.0, max_daily)
+    if budget is None:
+        return w
+    budget = np.broadcast_to(budget, (len(w),))
+    over = w.sum(axis=1) > budget
+    if not over.any():
+        return w
+    # Shift the over-budget rows down by tau (found by bisection) until they fit
+    rows = w[over]
+    low = np.zeros(len(rows))
+    high = rows.max(axis=1)
+    for _ in range(50):
+        tau = (low + high) / 2
+        too_much = np.clip(rows - tau[:, None], 0.0, max_daily).sum(axis=1) > budget[over]
+        low = np.where(too_much, tau, low)
+        high = np.where(too_much, high, tau)
+    w[over] = np.clip(rows - high[:, None], 0.0, max_daily)
+    return w
+
+# ------------------- PLANNER ------------------------
+
+class MPCPlanner:
+    # Plans N plots at once. plan() keeps its solution so the next day's solve
+    # starts from it shifted by a day (warm start).
+    def __init__(self, target_moisture=50.0, horizon=HORIZON, retention=RETENTION,
+                 bounds=MOISTURE_BOUNDS, max_daily=MAX_DAILY, budget=None,
+                 water_cost=WATER_COST, bound_weight=BOUND_WEIGHT,
+                 iterations=ITERATIONS, tolerance=TOLERANCE):
+        self.target = np.asarray(target_moisture, dtype=float)
+        self.horizon = horizon
+        self.retention = retention
+        self.low, self.high = bounds
+        self.max_daily = max_daily
+        self.budget = budget
+        self.water_cost = water_cost
+        self.bound_weight = bound_weight
+        self.iterations = iterations
+        self.tolerance = tolerance
+        self.A = dynamics(horizon, retention)
+        # Lipschitz constant of the gradient, band penalty included: with the fixed
+        # step 1/L FISTA (plus restart) is guaranteed to converge
+        self.lipschitz = 2 * (1 + bound_weight) * np.linalg.norm(self.A, 2) ** 2
+        self.previous = None
+        self.last_iterations = 0
+
+    def gradient(self, w, b, rows):
+        m = w @ self.A.T + b
+        target = self.target[rows, None] if self.target.ndim else self.target
+        outside = np.maximum(m - self.high, 0) - np.maximum(self.low - m, 0)
+        residual = (m - target) + self.bound_weight * outside
+        return 2 * residual @ self.A + self.water_cost
+
+    @traced("sim.mpc_plan")
+    def plan(self, moisture, rainfall, warm_start=None, budget=None):
+        # moisture (N,) now, rainfall (N, H) forecast -> watering plan (N, H);
+        # budget (scalar or per plot) replaces self.budget for this solve
+        rainfall = np.atleast_2d(np.asarray(rainfall, dtype=float))
+        n_plots = len(rainfall)
+        if rainfall.shape[1] < self.horizon:
+            # Unknown days beyond the forecast count as dry
+            rainfall = np.pad(rainfall, ((0, 0), (0, self.horizon - rainfall.shape[1])))
+        rainfall = rainfall[:, :self.horizon]
+        moisture = np.broadcast_to(np.asarray(moisture, dtype=float), (n_plots,))
+        b = free_response(moisture, rainfall, self.retention)
+        budget = self.budget if budget is None else budget
+        if budget is not None:
+            budget = np.broadcast_to(np.asarray(budget, dtype=float), (n_plots,))
+
+        if warm_start is None and self.previous is not None and len(self.previous) == n_plots:
+            # Yesterday's plan, moved one day on
+            warm_start = np.concatenate([self.previous[:, 1:], self.previous[:, -1:]], axis=1)
+        w = project(np.zeros((n_plots, self.horizon)) if warm_start is None else np.array(warm_start, dtype=float),
+                    self.max_daily, budget)
+
+        # Converged plots drop out, so the slowest few do not keep all N iterating
+        active = np.arange(n_plots)
+        x, y, b_active = w.copy(), w.copy(), b
+        t = np.ones((n_plots, 1))
+        iteration = 0
+        while len(active) and iteration < self.iterations:
+            iteration += 1
+            gradient = self.gradient(y, b_active, active)
+            x_next = project(y - gradient / self.lipschitz, self.max_daily,
+                             None if budget is None else budget[active])
+            # Restart the momentum of plots where it points uphill (adaptive restart)
+            t = np.where((gradient * (x_next - x)).sum(axis=1, keepdims=True) > 0, 1.0, t)
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y = x_next + ((t - 1) / t_next) * (x_next - x)
+            moving = np.abs(x_next - x).max(axis=1) >= self.tolerance
+            w[active] = x_next
+            if not moving.all():
+                active, b_active = active[moving], b_active[moving]
+                x_next, y, t_next = x_next[moving], y[moving], t_next[moving]
+            x, t = x_next, t_next
+        self.last_iterations = iteration
+        # Every iterate is already projected; clip once more so rounding can never
+        # hand out a negative amount or more than the pump delivers
+        w = np.clip(w, 0.0, self.max_daily)
+        self.previous = w
+        return w
+
+# ------------------- CLOSED LOOP ------------------------
+
+@traced("sim.mpc")
+def simulate_mpc_batch(rainfall, initial_moisture=30.0, target_moisture=50.0, planner=None, **kwargs):
+    # Same shape contract as weather.simulate_soil_moisture_batch: rainfall (N, T)
+    # -> moisture (N, T+1), watering (N, T). Each day is re-planned over the rain
+    # still ahead (the forecast is taken as exact) and only day one is applied.
+    # A budget is the total for the whole run: each re-plan only gets what is left.
+    rainfall = np.atleast_2d(np.asarray(rainfall, dtype=float))
+    n_plots, n_days = rainfall.shape
+    target = np.broadcast_to(np.asarray(target_moisture, dtype=float), (n_plots,))
+    planner = planner or MPCPlanner(target, **kwargs)
+    moisture = np.empty((n_plots, n_days + 1))
+    watering = np.empty((n_plots, n_days))
+    moisture[:, 0] = np.broadcast_to(np.asarray(initial_moisture, dtype=float), (n_plots,))
+    remaining = None
+    if planner.budget is not None:
+        remaining = np.broadcast_to(np.asarray(planner.budget, dtype=float), (n_plots,)).copy()
+
+    for day in range(n_days):
+        plan = planner.plan(moisture[:, day], rainfall[:, day:day + planner.horizon], budget=remaining)
+        # Applied amounts are rounded like the PID engines' output, and rounding
+        # up may not push a plot past what is left of its budget
+        watering[:, day] = round_watering(plan[:, 0])
+        if remaining is not None:
+            watering[:, day] = np.minimum(watering[:, day], remaining)
+            remaining = np.maximum(remaining - watering[:, day], 0.0)
+        new_moisture = moisture[:, day] * planner.retention + rainfall[:, day] + watering[:, day]
+        moisture[:, day + 1] = np.minimum(new_moisture, 100.0)
+
+    return moisture, watering
+
+if __name__ == "__main__":
+    import time
+
+    from pid_tuning import synthetic_rainfall
+    from weather import simulate_soil_moisture_batch
+
+    rain = synthetic_rainfall(10000, 14, seed=0)
+    start = time.perf_counter()
+    moisture, watering = simulate_mpc_batch(rain)
+    elapsed = time.perf_counter() - start
+    pid_moisture, pid_watering = simulate_soil_moisture_batch(rain)
+    print(f"MPC: 10000 plots x 14 days in {elapsed * 1000:.0f} ms")
+    for name, m, w in (("PID", pid_moisture, pid_watering), ("MPC", moisture, watering)):
+        below = (m[:, 1:] < MOISTURE_BOUNDS[0]).mean() * 100
+        above = (m[:, 1:] > MOISTURE_BOUNDS[1]).mean() * 100
+        error = np.abs(m[:, 1:] - 50.0).mean()
+        print(f"{name}: water {w.sum(axis=1).mean():6.1f} units/plot, off target {error:4.1f}%, "
+              f"{below:4.1f}% of days below {MOISTURE_BOUNDS[0]:.0f}%, {above:4.1f}% above {MOISTURE_BOUNDS[1]:.0f}%")
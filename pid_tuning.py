@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from weather import simulate_soil_moisture_batch
+
+# Search box for (Kp, Ki, Kd); weather.py uses (0.8, 0.05, 0.1), demo.py (1.0, 0.1, 0.05)
+GAIN_RANGES = ((0.0, 2.0), (0.0, 0.3), (0.0, 0.5))
+# cost = overshoot (% points) + % of time below target + litres-ish of water, weighted
+WEIGHTS = {'overshoot': 1.0, 'below': 1.0, 'water': 0.1}
+TOLERANCE = 2.0  # % points under target that still count as "on target"
+BLOCK_SIZE = 1024  # most gain sets per vectorized batch
+
+# ------------------- RAINFALL SCENARIOS -----------------------
+
+def synthetic_rainfall(n_series, days, wet_chance=0.3, mean_rain=6.0, seed=None):
+    # Wet/dry days with gamma distributed amounts, a common daily rainfall model
+    rng = np.random.default_rng(seed)
+    wet = rng.random((n_series, days)) < wet_chance
+    amounts = rng.gamma(shape=0.8, scale=mean_rain / 0.8, size=(n_series, days))
+    return np.round(np.where(wet, amounts, 0.0), 1)
+
+def historical_windows(series, days):
+    # Cuts one long daily record into overlapping windows of `days`
+    series = np.asarray(series, dtype=float)
+    if len(series) < days:
+        return None
+    return np.lib.stride_tricks.sliding_window_view(series, days)
+
+# ------------------- SCORING ------------------------
+
+def score_gains(gains, rainfall, initial_moisture, target_moisture, weights=WEIGHTS, tolerance=TOLERANCE):
+    # gains (G, 3) x rainfall scenarios (S, T) -> one batch of G*S plots
+    gains = np.asarray(gains, dtype=float)
+    n_gains, (n_series, n_days) = len(gains), rainfall.shape
+    moisture, watering = simulate_soil_moisture_batch(
+        np.tile(rainfall, (n_gains, 1)),
+        initial_moisture, target_moisture,
+        np.repeat(gains[:, 0], n_series),
+        np.repeat(gains[:, 1], n_series),
+        np.repeat(gains[:, 2], n_series),
+    )
+    moisture = moisture[:, 1:].reshape(n_gains, n_series, n_days)
+    overshoot = np.maximum(moisture - target_moisture, 0.0).max(axis=2).mean(axis=1)
+    below = (moisture < target_moisture - tolerance).mean(axis=(1, 2)) * 100
+    water = watering.reshape(n_gains, n_series, n_days).sum(axis=2).mean(axis=1)
+    score = weights['overshoot'] * overshoot + weights['below'] * below + weights['water'] * water
+    return np.column_stack([score, overshoot, below, water])
+
+def evaluate(gains, rainfall, initial_moisture, target_moisture, pool=None, weights=WEIGHTS):
+    # Splits the gain grid into blocks and spreads them over the pool's cores;
+    # with a pool, blocks are sized so every core gets one even for small grids
+    size = BLOCK_SIZE
+    if pool is not None:
+        size = max(1, min(BLOCK_SIZE, -(-len(gains) // (os.cpu_count() or 1))))
+    blocks = [gains[i:i + size] for i in range(0, len(gains), size)]
+    args = (rainfall, initial_moisture, target_moisture, weights)
+    if pool is None or len(blocks) == 1:
+        return np.concatenate([score_gains(block, *args) for block in blocks])
+    futures = [pool.submit(score_gains, block, *args) for block in blocks]
+    return np.concatenate([f.result() for f in futures])
+
+# ------------------- SEARCH ------------------------
+
+def gain_grid(points, stride=1):
+    # Integer lattice indices of a points^3 grid whose nodes are `stride` fine steps apart
+    axis = np.arange(points) * stride
+    return np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), axis=-1).reshape(-1, 3)
+
+def refine(survivors, stride, upper):
+    # 3x3x3 neighbourhood around each survivor index, `stride` fine steps out, clipped to the box
+    offsets = np.stack(np.meshgrid(*[[-1, 0, 1]] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+    candidates = np.clip(survivors[:, None, :] + offsets[None, :, :] * stride, 0, upper)
+    return np.unique(candidates.reshape(-1, 3), axis=0)
+
+def tune(rainfall, initial_moisture=30.0, target_moisture=50.0, points=10, levels=2,
+         keep=0.05, top=5, pool=None, ranges=GAIN_RANGES, weights=WEIGHTS):
+    # Coarse grid first, then only the best `keep` share is refined at half the spacing;
+    # the rest of the box is pruned without ever being simulated at fine resolution.
+    # Gain sets are tracked as integer indices on the finest lattice, so a refined
+    # point that lands on one already scored is recognised exactly and skipped.
+    scale = 2 ** levels
+    upper = (points - 1) * scale
+    low = np.array([r[0] for r in ranges])
+    fine_step = np.array([(high - low) / upper for low, high in ranges])
+    keys = np.array([(upper + 1) ** 2, upper + 1, 1])
+
+    index = gain_grid(points, scale)
+    scores = evaluate(low + index * fine_step, rainfall, initial_moisture, target_moisture, pool, weights)
+
+    for level in range(1, levels + 1):
+        n_keep = max(1, int(len(index) * keep))
+        survivors = index[np.argsort(scores[:, 0])[:n_keep]]
+        fine = refine(survivors, scale >> level, upper)
+        fine = fine[~np.isin(fine @ keys, index @ keys)]
+        if not len(fine):
+            continue
+        fine_scores = evaluate(low + fine * fine_step, rainfall, initial_moisture, target_moisture, pool, weights)
+        index = np.concatenate([index, fine])
+        scores = np.concatenate([scores, fine_scores])
+
+    gains = low + index * fine_step
+    evaluated = len(index)
+
+    order = np.argsort(scores[:, 0])[:top]
+    ranked = [{
+        'Kp': round(float(gains[i, 0]), 4), 'Ki': round(float(gains[i, 1]), 4),
+        'Kd': round(float(gains[i, 2]), 4), 'score': round(float(scores[i, 0]), 3),
+        'overshoot': round(float(scores[i, 1]), 3), 'time_below_pct': round(float(scores[i, 2]), 2),
+        'water': round(float(scores[i, 3]), 2),
+    } for i in order]
+    return ranked, evaluated
+
+# ------------------- CLI ------------------------
+
+def plot_scenarios(garden, args, index):
+    if garden.get('rainfall') and len(garden['rainfall']) >= args.days:
+        return historical_windows(garden['rainfall'], args.days)
+    return synthetic_rainfall(args.synthetic, args.days, seed=args.seed + index)
+
+def main(argv=None):
+    from garden_cli import MODEL_DEFAULTS, read_gardens
+
+    parser = argparse.ArgumentParser(description="Rank PID gains per plot by simulated watering quality.")
+    parser.add_argument("input", help="plots (.csv or .jsonl, as for garden_cli.py); a rainfall series "
+                                      "longer than --days is used as history, otherwise synthetic rain")
+    parser.add_argument("-o", "--output", default="-", help="ranked gains as JSONL (default stdout)")
+    parser.add_argument("--days", type=int, default=14, help="days per rainfall scenario")
+    parser.add_argument("--synthetic", type=int, default=200, help="synthetic scenarios per plot")
+    parser.add_argument("--points", type=int, default=10, help="coarse grid points per gain")
+    parser.add_argument("--levels", type=int, default=2, help="refinement levels")
+    parser.add_argument("--keep", type=float, default=0.05, help="share of candidates refined per level")
+    parser.add_argument("--top", type=int, default=5, help="gain sets reported per plot")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    defaults = MODEL_DEFAULTS['soil']
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    total = 0
+    # Each plot's search is driven from a thread of this process and hands its
+    # grid blocks to the shared process pool, so plots are tuned side by side and
+    # a single plot's grid is still spread across the cores; output stays in
+    # input order and at most 2 plots per worker wait in flight
+    inflight = deque()
+
+    def write_next():
+        nonlocal total
+        plot_id, future = inflight.popleft()
+        if isinstance(future, str):
+            out.write(json.dumps({'id': plot_id, 'error': future}) + "\n")
+            return
+        ranked, evaluated = future.result()
+        total += evaluated
+        out.write(json.dumps({'id': plot_id, 'evaluated': evaluated, 'gains': ranked}) + "\n")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool, \
+            ThreadPoolExecutor(max_workers=args.workers) as drivers:
+        for index, garden in enumerate(read_gardens(args.input)):
+            if garden.get('error'):
+                # Unreadable rows keep their place in the output as error rows
+                inflight.append((garden['id'], garden['error']))
+                continue
+            initial = garden['initial_moisture']
+            target = garden['target_moisture']
+            initial = defaults['initial_moisture'] if initial is None else initial
+            target = defaults['target_moisture'] if target is None else target
+            inflight.append((garden['id'], drivers.submit(
+                tune, plot_scenarios(garden, args, index), initial, target,
+                args.points, args.levels, args.keep, args.top, pool)))
+            while len(inflight) >= 2 * args.workers:
+                write_next()
+        while inflight:
+            write_next()
+    if out is not sys.stdout:
+        out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{total} gain sets scored in {elapsed:.2f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import numpy as np
+
+from ensemble import BASE_RETENTION, retention_from_temperature
+from instrumentation import traced
+from weather import BatchPIDController
+
+HOURS_PER_DAY = 24
+CHUNK_HOURS = 24 * 7  # hours handed out per yield
+# Hourly share of moisture kept, so 24 steps match the daily 0.85
+HOURLY_RETENTION = BASE_RETENTION ** (1 / HOURS_PER_DAY)
+
+# ------------------- SIMULATOR -----------------------
+
+class SeasonSimulator:
+    # Hourly soil moisture for N plots over any number of chunks. Moisture and PID
+    # state live on the object, so a season can be fed piece by piece, stopped,
+    # saved with state() and picked up again with from_state().
+    def __init__(self, initial_moisture=30.0, target_moisture=50.0, Kp=0.8, Ki=0.05, Kd=0.1,
+                 control_hours=HOURS_PER_DAY, plots=None):
+        self.params = (initial_moisture, target_moisture, Kp, Ki, Kd)
+        # The controller acts once every control_hours (daily, like the 5-day models)
+        self.control_hours = control_hours
+        self.hour = 0
+        self.moisture = self.pid = None
+        if plots is None:
+            size = np.broadcast(*[np.asarray(v) for v in self.params]).size
+            # Per-plot parameters fix the number of plots; with only scalars
+            # the first rainfall batch decides it
+            plots = size if size > 1 else None
+        if plots is not None:
+            self._allocate(plots)
+
+    def _allocate(self, plots):
+        initial_moisture, target_moisture, Kp, Ki, Kd = self.params
+        shape = (plots,)
+        self.moisture = np.array(np.broadcast_to(np.asarray(initial_moisture, dtype=float), shape))
+        self.pid = BatchPIDController(Kp, Ki, Kd, np.broadcast_to(np.asarray(target_moisture, dtype=float), shape))
+
+    @traced("sim.season")
+    def run(self, rainfall, temperature=None):
+        # rainfall (H,) or (N, H) mm per hour, temperature likewise in °C (optional);
+        # returns moisture after each hour and the watering given in it, both (N, H)
+        rainfall = np.asarray(rainfall, dtype=float)
+        if self.moisture is None:
+            self._allocate(len(rainfall) if rainfall.ndim > 1 else 1)
+        n_plots, n_hours = len(self.moisture), rainfall.shape[-1]
+        if rainfall.ndim > 1 and len(rainfall) not in (1, n_plots):
+            raise ValueError(f"rainfall has {len(rainfall)} plots but the simulator was set up for "
+                             f"{n_plots}; pass plots= or per-plot parameters")
+        rainfall = np.broadcast_to(np.nan_to_num(rainfall), (n_plots, n_hours))
+        if temperature is None:
+            retention = np.full((n_plots, n_hours), HOURLY_RETENTION)
+        else:
+            temperature = np.asarray(temperature, dtype=float)
+            retention = retention_from_temperature(np.broadcast_to(temperature, (n_plots, n_hours)))
+            retention = np.where(np.isnan(retention), BASE_RETENTION, retention) ** (1 / HOURS_PER_DAY)
+
+        moisture = np.empty((n_plots, n_hours))
+        watering = np.zeros((n_plots, n_hours))
+        current = self.moisture
+        # First hour in this chunk at which the controller acts
+        first = -self.hour % self.control_hours
+        for hour in range(n_hours):
+            # Same order as the daily model: decide on the current level, then
+            # decay + rain + watering, capped at 100
+            if hour % self.control_hours == first:
+                watering[:, hour] = self.pid.compute(current)
+            current = np.minimum(current * retention[:, hour] + rainfall[:, hour] + watering[:, hour], 100.0)
+            moisture[:, hour] = current
+
+        self.moisture = current
+        self.hour += n_hours
+        return moisture, watering
+
+    def state(self):
+        # Plain lists, so a checkpoint can go straight into JSON
+        if self.moisture is None:
+            self._allocate(1)
+        return {
+            'hour': self.hour,
+            'control_hours': self.control_hours,
+            'moisture': self.moisture.tolist(),
+            'target_moisture': self.pid.setpoint.tolist(),
+            'Kp': self.pid.Kp.tolist(), 'Ki': self.pid.Ki.tolist(), 'Kd': self.pid.Kd.tolist(),
+            'integral': self.pid.integral.tolist(),
+            'previous_error': self.pid.previous_error.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        sim = cls(state['moisture'], state['target_moisture'], state['Kp'], state['Ki'], state['Kd'],
+                  state['control_hours'], plots=len(state['moisture']))
+        sim.hour = state['hour']
+        sim.pid.integral[:] = state['integral']
+        sim.pid.previous_error[:] = state['previous_error']
+        return sim
+
+# ------------------- STREAMING ------------------------
+
+def hourly_chunks(rainfall, temperature=None, size=CHUNK_HOURS):
+    # Slices long hourly series (arrays or memory-mapped archives) without copying
+    n_hours = np.shape(rainfall)[-1]
+    for start in range(0, n_hours, size):
+        rain = rainfall[..., start:start + size]
+        temp = None if temperature is None else temperature[..., start:start + size]
+        yield rain, temp
+
+def simulate_season(chunks, simulator=None, **kwargs):
+    # chunks yields (rainfall, temperature) pieces in time order; yields
+    # (first hour, moisture, watering) per piece. Only one piece is held at a time.
+    sim = simulator or SeasonSimulator(**kwargs)
+    for rain, temp in chunks:
+        start = sim.hour
+        moisture, watering = sim.run(rain, temp)
+        yield start, moisture, watering
+
+if __name__ == "__main__":
+    import time
+
+    from pid_tuning import synthetic_rainfall
+
+    # A year of hourly rain: daily amounts spread over a few wet hours
+    hours = 365 * HOURS_PER_DAY
+    rng = np.random.default_rng(0)
+    daily = synthetic_rainfall(1, 365, seed=0)[0]
+    rain = np.repeat(daily / 4, HOURS_PER_DAY) * (rng.random(hours) < 4 / HOURS_PER_DAY)
+    temp = 25 + 8 * np.sin(np.arange(hours) * 2 * np.pi / HOURS_PER_DAY) \
+        + 6 * np.sin(np.arange(hours) * 2 * np.pi / hours)
+
+    start = time.perf_counter()
+    total_water = 0.0
+    for first, moisture, watering in simulate_season(hourly_chunks(rain, temp)):
+        total_water += watering.sum()
+    elapsed = time.perf_counter() - start
+    print(f"{hours} hours x 1 plot in {elapsed * 1000:.0f} ms, "
+          f"final moisture {moisture[0, -1]:.1f} %, water {total_water:.0f} units")
@@ -0,0 +1,314 @@
+import argparse
+import os
+import select
+import socket
+import threading
+import time
+
+import numpy as np
+
+from instrumentation import traced
+from weather import BatchPIDController
+
+# Live soil-moisture readings for the PID loop. Sensors (or a gateway in front
+# of them) send datagrams of packed READING records over UDP or a Unix datagram
+# socket; readings are averaged DECIMATION at a time into a fixed-size ring per
+# sensor, and every control interval each zone's PID acts on the mean of its
+# sensors' latest points.
+#
+# Memory is allocated once: the receive buffer, the rings and the per-sensor
+# partial sums. Each drained burst of datagrams is parsed in place and folded
+# into the rings with a handful of numpy calls, whatever its size.
+
+READING = np.dtype([('sensor', '<u4'), ('time', '<f8'), ('moisture', '<f4')])  # 16 bytes, no padding
+DEFAULT_ADDRESS = "udp://127.0.0.1:8766"
+RING_CAPACITY = 1024     # decimated points kept per sensor
+DECIMATION = 10          # raw readings averaged into one point
+CONTROL_INTERVAL = 60.0  # seconds between PID steps
+STALE_AFTER = 300.0      # seconds; a sensor quieter than this is left out of its zone
+RECV_BUFFER = 1 << 20    # bytes drained per burst (65536 readings)
+MAX_DATAGRAM = 65507     # largest UDP payload
+SOCKET_BUFFER = 4 << 20  # kernel receive buffer asked for, absorbs bursts while the rings update
+
+def parse_address(address):
+    # udp://host:port or unix:///path/to.sock -> (family, bind/send address)
+    scheme, _, rest = address.partition("://")
+    if scheme == "udp":
+        host, _, port = rest.rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    if scheme == "unix":
+        return socket.AF_UNIX, rest
+    raise ValueError(f"unsupported sensor address {address!r} (udp://host:port or unix:///path)")
+
+# ------------------- RING BUFFERS -----------------------
+
+class SensorRings:
+    # values/times (sensors, capacity): point k of a sensor sits at column
+    # k % capacity, filled[s] points written so far; readings that do not fill a
+    # point yet wait in partial_sum, seen[s] raw readings so far
+    def __init__(self, n_sensors, capacity=RING_CAPACITY, decimation=DECIMATION):
+        self.n_sensors = n_sensors
+        self.capacity = capacity
+        self.decimation = decimation
+        self.values = np.full((n_sensors, capacity), np.nan, dtype=np.float32)
+        self.times = np.zeros((n_sensors, capacity))
+        self.filled = np.zeros(n_sensors, dtype=np.int64)
+        self.seen = np.zeros(n_sensors, dtype=np.int64)
+        self.partial_sum = np.zeros(n_sensors)
+        self.lock = threading.Lock()
+        self.stats = {'readings': 0, 'points': 0, 'dropped': 0}
+
+    def ingest(self, readings):
+        # readings: READING records, any order and mix of sensors -> points written
+        sensor = readings['sensor']
+        known = sensor < self.n_sensors
+        if not known.all():
+            self.stats['dropped'] += int(len(sensor) - known.sum())
+            readings = readings[known]
+            sensor = readings['sensor']
+        if not len(readings):
+            return 0
+        order = np.argsort(sensor, kind="stable")
+        sensor = sensor[order].astype(np.int64)
+        value = readings['moisture'][order].astype(float)
+        stamp = readings['time'][order]
+
+        with self.lock:
+            decimation = self.decimation
+            # Each reading's raw index for its sensor -> the point it belongs to
+            first = np.empty(len(sensor), dtype=bool)
+            first[0] = True
+            np.not_equal(sensor[1:], sensor[:-1], out=first[1:])
+            group_start = np.flatnonzero(first)
+            counts = np.diff(np.append(group_start, len(sensor)))
+            rank = np.arange(len(sensor)) - np.repeat(group_start, counts)
+            point = (self.seen[sensor] + rank) // decimation
+
+            # Runs of one (sensor, point): sum them, the sensor's partial sum joins its first run
+            starts = np.flatnonzero(first | np.append(False, point[1:] != point[:-1]))
+            run_sum = np.add.reduceat(value, starts)
+            run_count = np.diff(np.append(starts, len(value)))
+            run_sensor = sensor[starts]
+            run_point = point[starts]
+            carried = first[starts]
+            run_sum[carried] += self.partial_sum[run_sensor[carried]]
+            run_count[carried] += self.seen[run_sensor[carried]] % decimation
+
+            done = run_count == decimation
+            done_sensor = run_sensor[done]
+            column = run_point[done] % self.capacity
+            self.values[done_sensor, column] = run_sum[done] / decimation
+            # Stamped with the time of the run's last reading
+            self.times[done_sensor, column] = stamp[np.append(starts[1:], len(stamp))[done] - 1]
+            # Runs are in point order per sensor, so the last write per sensor wins
+            self.filled[done_sensor] = run_point[done] + 1
+
+            batch_sensors = sensor[group_start]
+            self.partial_sum[batch_sensors] = 0.0
+            self.partial_sum[run_sensor[~done]] = run_sum[~done]
+            self.seen[batch_sensors] += counts
+            self.stats['readings'] += len(sensor)
+            self.stats['points'] += len(done_sensor)
+        return len(done_sensor)
+
+    def latest(self):
+        # Newest point per sensor: values, times (NaN / 0 where nothing is written yet)
+        with self.lock:
+            column = (self.filled - 1) % self.capacity
+            rows = np.arange(self.n_sensors)
+            values = self.values[rows, column].astype(float)
+            times = self.times[rows, column]
+            empty = self.filled == 0
+        values[empty] = np.nan
+        times[empty] = 0.0
+        return values, times
+
+    def window(self, sensor, n=None):
+        # Last n points of one sensor, oldest first: values, times
+        with self.lock:
+            filled = int(self.filled[sensor])
+            n = min(filled, self.capacity, n or self.capacity)
+            columns = np.arange(filled - n, filled) % self.capacity
+            return self.values[sensor, columns].astype(float), self.times[sensor, columns]
+
+# ------------------- CLOSED LOOP ------------------------
+
+class ZoneLoop:
+    # One PID per zone, fed the mean of the zone's fresh sensors; zones with no
+    # fresh sensor get no water and keep their PID state until one reports again
+    def __init__(self, rings, sensor_zone, target_moisture=50.0, Kp=0.8, Ki=0.05, Kd=0.1,
+                 stale_after=STALE_AFTER):
+        self.rings = rings
+        self.sensor_zone = np.asarray(sensor_zone, dtype=np.int64)
+        self.n_zones = int(self.sensor_zone.max()) + 1 if len(self.sensor_zone) else 0
+        target = np.broadcast_to(np.asarray(target_moisture, dtype=float), (self.n_zones,))
+        self.pid = BatchPIDController(Kp, Ki, Kd, setpoint=target.copy())
+        self.stale_after = stale_after
+
+    def zone_moisture(self, now=None):
+        # -> moisture per zone (NaN without fresh sensors), fresh sensors per zone
+        now = time.time() if now is None else now
+        values, times = self.rings.latest()
+        fresh = ~np.isnan(values) & (now - times <= self.stale_after)
+        total = np.bincount(self.sensor_zone, weights=np.where(fresh, values, 0.0), minlength=self.n_zones)
+        count = np.bincount(self.sensor_zone, weights=fresh, minlength=self.n_zones)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return total / count, count.astype(np.int64)
+
+    @traced("sensor.control")
+    def step(self, now=None):
+        # -> moisture, watering per zone
+        moisture, count = self.zone_moisture(now)
+        reporting = count > 0
+        pid = self.pid
+        integral, previous_error = pid.integral.copy(), pid.previous_error.copy()
+        watering = pid.compute(np.where(reporting, moisture, pid.setpoint))
+        pid.integral[~reporting] = integral[~reporting]
+        pid.previous_error = np.where(reporting, pid.previous_error, previous_error)
+        watering[~reporting] = 0.0
+        return moisture, watering
+
+# ------------------- SOCKET SERVER ------------------------
+
+class SensorServer:
+    # Drains the socket into one preallocated buffer and ingests each burst at once
+    def __init__(self, address, rings):
+        self.family, self.address = parse_address(address)
+        self.rings = rings
+        self.sock = socket.socket(self.family, socket.SOCK_DGRAM)
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+        except OSError:
+            pass
+        self.sock.bind(self.address)
+        self.sock.setblocking(False)
+        self.buffer = bytearray(RECV_BUFFER)
+        self.view = memoryview(self.buffer)
+        self.running = False
+        self.stats = {'datagrams': 0, 'bursts': 0, 'malformed': 0}
+
+    def serve_forever(self, poll=0.5):
+        self.running = True
+        while self.running:
+            ready, _, _ = select.select([self.sock], [], [], poll)
+            if ready:
+                self.drain()
+
+    def drain(self):
+        # Whatever is queued, up to one buffer's worth -> readings ingested
+        size = READING.itemsize
+        end = 0
+        while end + MAX_DATAGRAM <= len(self.buffer):
+            try:
+                n = self.sock.recv_into(self.view[end:], MAX_DATAGRAM)
+            except BlockingIOError:
+                break
+            self.stats['datagrams'] += 1
+            if n % size:
+                self.stats['malformed'] += 1
+                continue
+            end += n
+        if not end:
+            return 0
+        self.stats['bursts'] += 1
+        self.rings.ingest(np.frombuffer(self.buffer, READING, end // size))
+        return end // size
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.sock.close()
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+
+# ------------------- REPLAY ------------------------
+
+def replay(address, n_sensors=1000, rate=20000.0, duration=10.0, batch=64, seed=0):
+    # Stand-in for real sensors: n_sensors drying soils with sensor noise, sent
+    # round-robin at about `rate` readings/s in datagrams of `batch` readings
+    family, target = parse_address(address)
+    rng = np.random.default_rng(seed)
+    level = rng.uniform(40.0, 60.0, n_sensors)
+    noise = rng.normal(0.0, 0.5, 4096).astype(np.float32)
+    packet = np.zeros(batch, READING)
+    offsets = np.arange(batch)
+    sent = 0
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        start = time.monotonic()
+        while time.monotonic() - start < duration:
+            ids = (offsets + sent) % n_sensors
+            packet['sensor'] = ids
+            packet['time'] = time.time()
+            packet['moisture'] = level[ids] + noise[(offsets + sent) % len(noise)]
+            level[ids] -= 0.001  # drying out between readings
+            try:
+                sock.sendto(packet, target)
+            except BlockingIOError:
+                continue
+            sent += batch
+            ahead = sent / rate - (time.monotonic() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+    return sent
+
+# ------------------- MAIN ------------------------
+
+def serve(args):
+    rings = SensorRings(args.sensors, args.capacity, args.decimation)
+    loop = ZoneLoop(rings, np.arange(args.sensors) % args.zones, args.target)
+    server = SensorServer(args.address, rings)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Listening on {args.address}: {args.sensors} sensors in {args.zones} zones")
+    last = dict(rings.stats)
+    try:
+        while True:
+            time.sleep(args.interval)
+            moisture, watering = loop.step()
+            readings = rings.stats['readings'] - last['readings']
+            last = dict(rings.stats)
+            reporting = ~np.isnan(moisture)
+            print(f"{readings / args.interval:9.0f} readings/s, {reporting.sum()}/{loop.n_zones} zones reporting, "
+                  f"mean moisture {np.nanmean(moisture) if reporting.any() else float('nan'):5.1f}%, "
+                  f"watering {watering.sum():8.1f} units, dropped {rings.stats['dropped']}, "
+                  f"malformed {server.stats['malformed']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        thread.join()
+        server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest soil-moisture sensor readings and run the per-zone PID loop on them.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="receive readings and water each zone every --interval seconds")
+    p.add_argument("address", nargs="?", default=DEFAULT_ADDRESS, help="udp://host:port or unix:///path")
+    p.add_argument("--sensors", type=int, default=10000)
+    p.add_argument("--zones", type=int, default=1000, help="sensor i belongs to zone i %% zones")
+    p.add_argument("--target", type=float, default=50.0, help="target moisture %%")
+    p.add_argument("--capacity", type=int, default=RING_CAPACITY)
+    p.add_argument("--decimation", type=int, default=DECIMATION)
+    p.add_argument("--interval", type=float, default=CONTROL_INTERVAL)
+
+    p = sub.add_parser("replay", help="send synthetic readings, standing in for real sensors")
+    p.add_argument("address", nargs="?", default=DEFAULT_ADDRESS)
+    p.add_argument("--sensors", type=int, default=10000)
+    p.add_argument("--rate", type=float, default=20000, help="readings per second")
+    p.add_argument("--duration", type=float, default=10.0)
+    p.add_argument("--batch", type=int, default=64, help="readings per datagram")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        serve(args)
+    else:
+        start = time.monotonic()
+        sent = replay(args.address, args.sensors, args.rate, args.duration, args.batch)
+        print(f"Sent {sent} readings in {time.monotonic() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import json
+import os
+
+from forecast_cache import CACHE_DIR
+
+# Last session's window, per app: the location it had settled on (city label,
+# lat, lon) plus one PNG per chart tab. Shown as-is while matplotlib loads and
+# the live forecast for that location comes in.
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshot")
+# Seconds from process start to the shell window on screen (and to live charts);
+# checked by benchmarks/cold_start.py
+COLD_START_TARGET = {'shell': 0.5, 'charts': 1.5}
+
+def snapshot_path(app_name, name):
+    return os.path.join(SNAPSHOT_DIR, app_name, name)
+
+def load_snapshot(app_name):
+    # {'city': ..., 'lat': ..., 'lon': ..., 'charts': {chart_type: png path}};
+    # no location and no charts if there is no usable snapshot yet
+    empty = {'city': None, 'lat': None, 'lon': None, 'charts': {}}
+    try:
+        with open(snapshot_path(app_name, "snapshot.json"), encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if not isinstance(snapshot, dict) or snapshot.get('lat') is None or snapshot.get('lon') is None:
+        # Without its location the images could belong to any city
+        return empty
+    return {
+        'city': snapshot.get('city'),
+        'lat': float(snapshot['lat']),
+        'lon': float(snapshot['lon']),
+        'charts': {chart_type: path for chart_type, path in snapshot.get('charts', {}).items()
+                   if os.path.exists(path)},
+    }
+
+def save_snapshot(app_name, location, charts):
+    # location: {'city', 'lat', 'lon'} of the forecast on screen; charts: the app's ChartCanvas widgets
+    os.makedirs(os.path.join(SNAPSHOT_DIR, app_name), exist_ok=True)
+    images = {}
+    for canvas in charts:
+        path = snapshot_path(app_name, f"{canvas.chart_type}.png")
+        try:
+            canvas.save_image(path)
+        except (OSError, ValueError) as e:
+            print("Snapshot error:", e)
+            continue
+        images[canvas.chart_type] = path
+    path = snapshot_path(app_name, "snapshot.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({'city': location['city'], 'lat': location['lat'], 'lon': location['lon'],
+                   'charts': images}, f)
+    os.replace(tmp, path)
@@ -0,0 +1,27 @@
+import os
+
+from chart_report import render_chunk, site_dir_name
+
+FORECAST = {'latitude': 28.61, 'longitude': 77.2,
+            'daily': {'time': ['2025-06-01', '2025-06-02'], 'temperature_2m_max': [31.0, 28.0],
+                      'temperature_2m_min': [22.0, 20.0], 'precipitation_sum': [0.0, 7.5]}}
+
+def test_unsafe_or_missing_ids_fall_back_to_the_row():
+    assert site_dir_name("plot-7", 3) == "plot-7"
+    assert site_dir_name(12, 3) == "12"
+    for site_id in (None, "", "../x", "/tmp/x", "a/b", ".hidden", ".."):
+        assert site_dir_name(site_id, 3) == "row-3"
+
+def test_every_site_gets_a_manifest_entry_and_stays_inside(tmp_path):
+    out = tmp_path / "reports"
+    sites = [("../x", site_dir_name("../x", 1), 28.61, 77.2, FORECAST, None),
+             (None, site_dir_name(None, 2), 28.61, 77.2, FORECAST, None),
+             ("bad", None, None, None, None, "bad coordinates lat='1' lon=''"),
+             ("gone", "gone", 1.0, 2.0, None, None)]
+    results = render_chunk(sites, str(out), ['bar'], ['png'])
+    assert [r['id'] for r in results] == ["../x", None, "bad", "gone"]
+    assert results[0]['files'] == [os.path.join(str(out), "row-1", "bar.png")]
+    assert results[1]['files'] == [os.path.join(str(out), "row-2", "bar.png")]
+    assert results[2]['error'] == "bad coordinates lat='1' lon=''"
+    assert results[3]['error'] == "no forecast"
+    assert not (tmp_path / "x").exists()
@@ -0,0 +1,108 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from fleet_fetcher import FleetFetcher
+
+def site(lat, lon):
+    return {'latitude': lat, 'longitude': lon,
+            'daily': {'time': ['2025-06-01'], 'precipitation_sum': [lat]}}
+
+class StubHandler(BaseHTTPRequestHandler):
+    # mode: "ok" (one object per site), "short" (first site only), "error" (HTTP 500)
+    mode = "ok"
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        lats = [float(v) for v in query['latitude'][0].split(",")]
+        lons = [float(v) for v in query['longitude'][0].split(",")]
+        if self.mode == "error":
+            self.send_response(500)
+            self.end_headers()
+            return
+        sites = [site(lat, lon) for lat, lon in zip(lats, lons)]
+        if self.mode == "short":
+            sites = sites[0]
+        body = json.dumps(sites).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_port}/v1/forecast"
+    server.shutdown()
+    StubHandler.mode = "ok"
+
+def fetch(fetcher, coords):
+    # On a daemon thread, so a hang fails the test instead of blocking the run
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = fetcher.fetch(coords)
+        except Exception as e:
+            outcome['error'] = e
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive(), "fetch() did not return"
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+def test_batched_fetch(stub):
+    _, url = stub
+    fetcher = FleetFetcher(base_url=url, batch_size=2, rate_limit=100)
+    try:
+        results = fetch(fetcher, [(1.0, 2.0), (3.0, 4.0), (5.0, 6.0), (1.0, 2.0)])
+    finally:
+        fetcher.close()
+    assert [r['latitude'] for r in results] == [1.0, 3.0, 5.0, 1.0]
+    assert fetcher.stats['requests'] == 2
+
+def test_short_response_resolves_missing_sites(stub):
+    _, url = stub
+    StubHandler.mode = "short"
+    fetcher = FleetFetcher(base_url=url, batch_size=2, rate_limit=100)
+    results = fetch(fetcher, [(1.0, 2.0), (3.0, 4.0)])
+    fetcher.close()
+    assert results[0]['latitude'] == 1.0
+    assert results[1] is None
+
+def test_failing_service_gives_none(stub):
+    _, url = stub
+    StubHandler.mode = "error"
+    fetcher = FleetFetcher(base_url=url, max_retries=1, backoff=0.01, rate_limit=100)
+    try:
+        results = fetch(fetcher, [(1.0, 2.0), (3.0, 4.0)])
+    finally:
+        fetcher.close()
+    assert results == [None, None]
+    assert fetcher.stats['requests'] == 2
+
+def test_cache_error_is_raised_not_hung(stub):
+    _, url = stub
+
+    class BrokenCache:
+        def fresh(self, lat, lon, daily):
+            return None
+
+        def put(self, key, data):
+            raise OSError("disk full")
+
+    fetcher = FleetFetcher(base_url=url, rate_limit=100, cache=BrokenCache())
+    with pytest.raises(OSError):
+        fetch(fetcher, [(1.0, 2.0)])
+    assert not fetcher.inflight
+    fetcher.close()
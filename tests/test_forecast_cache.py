@@ -0,0 +1,25 @@
+import demo
+import forecast_cache
+from forecast_cache import ForecastCache
+
+def test_fresh_counts_hits_and_misses(tmp_path):
+    cache = ForecastCache(str(tmp_path / "forecasts.sqlite"), fetcher=lambda lat, lon, daily: None)
+    assert cache.fresh(1.0, 2.0, ("precipitation_sum",)) is None
+    cache.put(forecast_cache.cache_key(1.0, 2.0, ("precipitation_sum",)), {'daily': {}})
+    assert cache.fresh(1.0, 2.0, ("precipitation_sum",)) == {'daily': {}}
+    assert cache.stats['hits'] == 1
+    assert cache.stats['fresh_misses'] == 1
+    assert cache.stats['misses'] == 0
+
+def test_fresh_then_get_counts_one_miss(tmp_path):
+    cache = ForecastCache(str(tmp_path / "forecasts.sqlite"), fetcher=lambda lat, lon, daily: {'daily': {}})
+    assert cache.fresh(1.0, 2.0, ("precipitation_sum",)) is None
+    assert cache.get(1.0, 2.0, ("precipitation_sum",)) == {'daily': {}}
+    assert cache.stats['misses'] == 1
+
+def test_failed_fetch_without_cache(tmp_path, monkeypatch):
+    cache = ForecastCache(str(tmp_path / "forecasts.sqlite"), fetcher=lambda lat, lon, daily: None)
+    monkeypatch.setattr(forecast_cache, "_cache", cache)
+    assert demo.fetch_weather_data(None, (1.0, 2.0)) is None
+    assert demo.simulate_garden(None, (1.0, 2.0)) is None
+    assert cache.stats['errors'] == 2
@@ -0,0 +1,22 @@
+import pytest
+
+from forecast_cache import COORD_DECIMALS
+from forecast_grid import GRID_SPACING, ForecastGrid
+
+def test_default_spacing_is_accepted():
+    assert ForecastGrid(None).spacing == GRID_SPACING
+    assert ForecastGrid(None, 10 ** -COORD_DECIMALS).spacing == 10 ** -COORD_DECIMALS
+
+@pytest.mark.parametrize("spacing", [10 ** -COORD_DECIMALS / 2, 0.0, -0.05, float("nan")])
+def test_spacing_below_coordinate_resolution_is_rejected(spacing):
+    with pytest.raises(ValueError):
+        ForecastGrid(None, spacing)
+
+@pytest.mark.parametrize("spacing", [0.015, 0.0125, 0.101])
+def test_spacing_off_the_coordinate_resolution_is_rejected(spacing):
+    with pytest.raises(ValueError, match="multiple"):
+        ForecastGrid(None, spacing)
+
+@pytest.mark.parametrize("spacing", [0.02, 0.05, 0.1, 0.25, 1.0])
+def test_spacing_on_the_coordinate_resolution_is_accepted(spacing):
+    assert ForecastGrid(None, spacing).spacing == spacing
@@ -0,0 +1,34 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from forecast import Forecast
+from garden_charts import ChartPainter
+
+def forecast(temp_max, temp_min, rain):
+    return Forecast.from_json({'daily': {
+        'time': ['2025-06-0%d' % d for d in range(1, 6)],
+        'temperature_2m_max': temp_max, 'temperature_2m_min': temp_min, 'precipitation_sum': rain,
+    }})
+
+@pytest.mark.parametrize("chart_type", ['line', 'bar', 'area', 'pie', 'soil'])
+def test_all_missing_column_shows_message(chart_type):
+    fig = Figure()
+    canvas = FigureCanvasAgg(fig)
+    painter = ChartPainter(fig, chart_type)
+    painter.update(forecast([30, 31, 29, 28, 33], [20, 21, 19, 18, 22], [0, 5, 2, 0, 1]))
+    painter.render(canvas)
+    missing = forecast([None] * 5, [None] * 5, [None] * 5)
+    for _ in range(2):
+        painter.update(missing)
+        painter.render(canvas)
+        if chart_type != 'pie':
+            assert painter.artists is None
+    # Real data again rebuilds the chart
+    painter.update(forecast([30, 31, 29, 28, 33], [20, 21, 19, 18, 22], [0, 5, 2, 0, 1]))
+    painter.render(canvas)
+    assert painter.artists is not None
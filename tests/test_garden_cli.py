@@ -0,0 +1,43 @@
+from garden_cli import parse_garden, read_gardens, simulate_chunk
+
+
+def test_results_keep_input_order_with_error_rows_in_place():
+    chunk = [parse_garden({'id': 'a', 'rainfall': [0, 1, 2, 3, 4]}),
+             parse_garden({'id': 'b'}),
+             parse_garden({'id': 'c', 'rainfall': "1;2;3;4;5"})]
+    results = simulate_chunk(chunk, "soil", 5)
+    assert [r['id'] for r in results] == ['a', 'b', 'c']
+    assert results[1] == {'id': 'b', 'error': "no rainfall series"}
+    assert 'watering' in results[0] and 'watering' in results[2]
+
+
+def test_half_given_position_becomes_an_error_row():
+    garden = parse_garden({'id': 'x', 'lat': "51.5", 'lon': ""})
+    assert 'lat' not in garden
+    [result] = simulate_chunk([garden], "soil", 5)
+    assert result['id'] == 'x' and "coordinates" in result['error']
+
+
+def test_short_series_has_its_own_message():
+    [result] = simulate_chunk([parse_garden({'id': 's', 'rainfall': [1, 2]})], "soil", 5)
+    assert result['error'] == "rainfall series has 2 days, need 5"
+
+def test_bad_parameter_becomes_an_error_row():
+    garden = parse_garden({'id': 'k', 'Kp': "abc", 'rainfall': [1, 2, 3, 4, 5]})
+    [result] = simulate_chunk([garden], "soil", 5)
+    assert result == {'id': 'k', 'error': "bad Kp 'abc'"}
+
+def test_non_numeric_rainfall_becomes_an_error_row():
+    garden = parse_garden({'id': 'r', 'rainfall': "1;2;wet;4;5"})
+    [result] = simulate_chunk([garden], "soil", 5)
+    assert result['id'] == 'r' and result['error'].startswith("bad rainfall series")
+
+def test_malformed_jsonl_line_becomes_an_error_row(tmp_path):
+    source = tmp_path / "gardens.jsonl"
+    source.write_text('{"id": "a", "rainfall": [0, 1, 2, 3, 4]}\n{"id": "b", \n[1, 2]\n'
+                      '{"id": "c", "rainfall": [1, 2, 3, 4, 5]}\n', encoding="utf-8")
+    results = simulate_chunk(list(read_gardens(str(source))), "soil", 5)
+    assert [r['id'] for r in results] == ['a', None, None, 'c']
+    assert results[1]['error'].startswith("bad JSON on line 2")
+    assert results[2]['error'] == "line 3 is not a JSON object"
+    assert 'watering' in results[3]
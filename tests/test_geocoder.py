@@ -0,0 +1,29 @@
+import geocoder
+from geocoder import Gazetteer, split_country
+
+def test_split_country():
+    assert split_country("Paris, US") == ("Paris", "US")
+    assert split_country("Paris") == ("Paris", None)
+    assert split_country("Springfield, Illinois") == ("Springfield", None)
+
+def test_country_suffix_picks_that_country(tmp_path, monkeypatch):
+    source = tmp_path / "cities.tsv"
+    source.write_text("Paris\tParis\t\t48.85\t2.35\tFR\t2138551\n"
+                      "Paris\tParis\t\t33.66\t-95.56\tUS\t24782\n", encoding="utf-8")
+    gazetteer = Gazetteer(str(tmp_path / "places.sqlite"), str(source))
+    monkeypatch.setattr(geocoder, "_gazetteer", gazetteer)
+    assert geocoder.get_coordinates("Paris, US") == (33.66, -95.56)
+    assert geocoder.get_coordinates("Paris, FR") == (48.85, 2.35)
+    assert geocoder.get_coordinates("Paris") == (48.85, 2.35)
+    # Suggestions round-trip through get_coordinates
+    for suggestion in gazetteer.prefix("par"):
+        assert geocoder.get_coordinates(suggestion) in ((33.66, -95.56), (48.85, 2.35))
+
+def test_most_populous_namesake_wins_in_either_order(tmp_path):
+    rows = ["Springfield\tSpringfield\t\t39.80\t-89.64\tUS\t116250\n",
+            "Springfield\tSpringfield\t\t42.10\t-72.59\tUS\t59403\n"]
+    for order, name in ((rows, "a"), (rows[::-1], "b")):
+        source = tmp_path / f"{name}.tsv"
+        source.write_text("".join(order), encoding="utf-8")
+        gazetteer = Gazetteer(str(tmp_path / f"{name}.sqlite"), str(source))
+        assert gazetteer.lookup("Springfield", "US") == (39.80, -89.64)
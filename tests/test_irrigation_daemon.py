@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+from irrigation_daemon import ApiServer, IrrigationScheduler
+
+class StubFetcher:
+    def fetch(self, coords):
+        return [{'latitude': lat, 'longitude': lon,
+                 'daily': {'time': ['2025-06-01', '2025-06-02'], 'precipitation_sum': [0.0, 4.0]}}
+                for lat, lon in coords]
+
+async def request(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+def test_zone_api():
+    async def run():
+        scheduler = IrrigationScheduler(fetcher=StubFetcher())
+        api = ApiServer(scheduler)
+        server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            for bad in (b"[1, 2]", b'{"id": "a", "lat": {}, "lon": 1}', b"not json", b'{"id": "a"}',
+                        b'{"id": "a", "lat": 1, "lon": 1, "Kp": "abc"}'):
+                status, payload = await request(port, "POST", "/zones", bad)
+                assert status == 400, (bad, payload)
+            status, payload = await request(port, "POST", "/zones", b'{"id": "z1", "lat": 28.61, "lon": 77.2}')
+            assert status == 200 and payload['pending']
+            # The fetch task runs to completion even though nothing else refers to it
+            while api.tasks:
+                await asyncio.sleep(0.01)
+            status, plan = await request(port, "GET", "/zones/z1")
+            assert status == 200 and len(plan['watering']) == 2
+            status, commands = await request(port, "GET", "/commands?since=0")
+            assert [c['zone'] for c in commands] == ["z1"]
+    asyncio.run(run())
@@ -0,0 +1,34 @@
+import numpy as np
+
+from mpc_planner import MPCPlanner, simulate_mpc_batch
+from pid_tuning import synthetic_rainfall
+
+def test_plans_stay_inside_the_box_and_budget():
+    rng = np.random.default_rng(0)
+    rain = synthetic_rainfall(500, 5, seed=1)
+    moisture = rng.uniform(0, 100, 500)
+    planner = MPCPlanner(max_daily=15.0, budget=30.0)
+    plan = planner.plan(moisture, rain)
+    assert plan.min() >= 0.0
+    assert plan.max() <= 15.0
+    assert (plan.sum(axis=1) <= 30.0 + 1e-9).all()
+
+def test_converges_to_the_reference_solution():
+    rng = np.random.default_rng(1)
+    rain = synthetic_rainfall(300, 5, seed=2)
+    moisture = rng.uniform(20, 80, 300)
+    reference = MPCPlanner(iterations=20000, tolerance=1e-9).plan(moisture, rain)
+    plan = MPCPlanner().plan(moisture, rain)
+    assert np.abs(plan[:, 0] - reference[:, 0]).max() < 0.05
+
+def test_closed_loop_shapes():
+    moisture, watering = simulate_mpc_batch(synthetic_rainfall(10, 7, seed=3))
+    assert moisture.shape == (10, 8)
+    assert watering.shape == (10, 7)
+    assert (watering >= 0).all()
+
+def test_closed_loop_budget_covers_the_whole_run():
+    rain = synthetic_rainfall(50, 14, seed=4)
+    moisture, watering = simulate_mpc_batch(rain, 30, 50, budget=20.0)
+    assert (watering.sum(axis=1) <= 20.0 + 1e-9).all()
+    assert np.allclose(watering, np.round(watering, 2))
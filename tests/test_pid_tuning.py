@@ -0,0 +1,20 @@
+from pid_tuning import synthetic_rainfall, tune
+
+
+def test_tune_reports_distinct_gain_sets():
+    ranked, evaluated = tune(synthetic_rainfall(200, 14, seed=0))
+    gains = [(g['Kp'], g['Ki'], g['Kd']) for g in ranked]
+    assert len(ranked) == 5
+    assert len(set(gains)) == len(gains)
+    # the coarse grid plus at most 26 new neighbours per survivor per level
+    assert 1000 < evaluated <= 1000 + 50 * 26 + 52 * 26
+
+
+def test_tune_is_the_same_with_a_pool():
+    from concurrent.futures import ProcessPoolExecutor
+
+    rain = synthetic_rainfall(20, 7, seed=1)
+    serial = tune(rain, points=5, levels=1)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        pooled = tune(rain, points=5, levels=1, pool=pool)
+    assert serial == pooled
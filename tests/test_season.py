@@ -0,0 +1,34 @@
+import json
+
+import numpy as np
+
+from pid_tuning import synthetic_rainfall
+from season import HOURLY_RETENTION, SeasonSimulator, hourly_chunks, simulate_season
+from weather import round_watering, simulate_soil_moisture_batch
+
+def test_plots_come_from_the_first_rainfall_batch():
+    rain = synthetic_rainfall(6, 48, seed=0) / 24
+    moisture, watering = SeasonSimulator().run(rain)
+    assert moisture.shape == watering.shape == (6, 48)
+
+def test_checkpoint_round_trip_matches_an_uninterrupted_run():
+    rain = synthetic_rainfall(4, 24 * 10, seed=1) / 6
+    temp = np.full_like(rain, 28.0)
+    whole = SeasonSimulator(target_moisture=[45, 50, 55, 60])
+    expected, _ = whole.run(rain, temp)
+
+    first = SeasonSimulator(target_moisture=[45, 50, 55, 60])
+    pieces = [first.run(rain[:, :100], temp[:, :100])[0]]
+    resumed = SeasonSimulator.from_state(json.loads(json.dumps(first.state())))
+    pieces += [m for _, m, _ in simulate_season(hourly_chunks(rain[:, 100:], temp[:, 100:], 50), resumed)]
+    assert np.array_equal(np.concatenate(pieces, axis=1), expected)
+    assert resumed.hour == whole.hour
+
+def test_hourly_control_matches_the_daily_batch_engine():
+    # Acting every hour with the hourly retention is the batch engine with hours for days
+    rain = synthetic_rainfall(5, 30, seed=2)
+    initial = np.array([10.0, 30.0, 50.0, 70.0, 90.0])
+    moisture, watering = SeasonSimulator(initial, 50.0, control_hours=1).run(rain)
+    ref_moisture, ref_watering = simulate_soil_moisture_batch(rain, initial, 50.0, retention=HOURLY_RETENTION)
+    assert np.allclose(moisture, ref_moisture[:, 1:])
+    assert np.array_equal(round_watering(watering), ref_watering)
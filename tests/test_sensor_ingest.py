@@ -0,0 +1,73 @@
+import socket
+import time
+
+import numpy as np
+
+from sensor_ingest import READING, SensorRings, SensorServer
+
+def readings(sensor, stamp, moisture):
+    records = np.zeros(len(sensor), READING)
+    records['sensor'], records['time'], records['moisture'] = sensor, stamp, moisture
+    return records
+
+def brute_force(records, n_sensors, capacity, decimation):
+    # Every sensor's readings in arrival order, averaged decimation at a time
+    points = []
+    for s in range(n_sensors):
+        mine = records[records['sensor'] == s]
+        full = len(mine) // decimation * decimation
+        values = mine['moisture'][:full].astype(float).reshape(-1, decimation).mean(axis=1)
+        times = mine['time'][decimation - 1:full:decimation]
+        points.append((values[-capacity:], times[-capacity:]))
+    return points
+
+def test_rings_match_brute_force_across_bursts_and_wraparound():
+    rng = np.random.default_rng(0)
+    n_sensors, capacity, decimation = 7, 5, 3
+    n = 600
+    records = readings(rng.integers(0, n_sensors, n), np.arange(n, dtype=float),
+                       rng.uniform(0, 100, n).astype(np.float32))
+    rings = SensorRings(n_sensors, capacity, decimation)
+    cuts = np.sort(rng.choice(np.arange(1, n), 40, replace=False))
+    for burst in np.split(records, cuts):
+        rings.ingest(burst)
+
+    expected = brute_force(records, n_sensors, capacity, decimation)
+    for s, (values, times) in enumerate(expected):
+        assert len(values) == capacity  # every ring has wrapped at least once
+        got_values, got_times = rings.window(s)
+        assert np.allclose(got_values, values.astype(np.float32), rtol=1e-6)
+        assert np.array_equal(got_times, times)
+    latest, stamps = rings.latest()
+    assert np.allclose(latest, [v[-1] for v, _ in expected], rtol=1e-6)
+    assert rings.stats['readings'] == n
+
+def test_partial_points_and_unknown_sensors():
+    rings = SensorRings(2, capacity=4, decimation=4)
+    assert rings.ingest(readings([0, 0, 1, 5], [1, 2, 3, 4], [10, 20, 30, 40])) == 0
+    assert rings.stats['dropped'] == 1
+    assert np.isnan(rings.latest()[0]).all()
+    assert rings.ingest(readings([0, 0, 0], [5, 6, 7], [30, 40, 99])) == 1
+    values, times = rings.window(0)
+    assert values.tolist() == [25.0] and times.tolist() == [6.0]
+    assert rings.partial_sum[0] == 99.0 and rings.seen[0] == 5
+
+def test_udp_datagrams_are_parsed_and_malformed_ones_rejected():
+    rings = SensorRings(3, capacity=8, decimation=2)
+    server = SensorServer("udp://127.0.0.1:0", rings)
+    try:
+        target = server.sock.getsockname()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(readings([0, 0, 1, 9], [1, 2, 3, 4], [40, 60, 10, 10]).tobytes(), target)
+            sock.sendto(b"\x00" * (READING.itemsize + 3), target)
+            sock.sendto(readings([1], [5], [30]).tobytes(), target)
+        deadline = time.monotonic() + 2.0
+        while server.stats['datagrams'] < 3 and time.monotonic() < deadline:
+            server.drain()
+            time.sleep(0.01)
+    finally:
+        server.close()
+    assert server.stats['malformed'] == 1
+    assert rings.stats == {'readings': 4, 'points': 2, 'dropped': 1}
+    values, _ = rings.latest()
+    assert values[0] == 50.0 and values[1] == 20.0 and np.isnan(values[2])
@@ -0,0 +1,25 @@
+import json
+
+import startup_snapshot
+from startup_snapshot import load_snapshot, save_snapshot, snapshot_path
+
+class StubCanvas:
+    chart_type = "line"
+
+    def save_image(self, path):
+        with open(path, "wb") as f:
+            f.write(b"png")
+
+def test_snapshot_keeps_the_settled_location(tmp_path, monkeypatch):
+    monkeypatch.setattr(startup_snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    save_snapshot("app", {'city': "paris", 'lat': 48.85, 'lon': 2.35}, [StubCanvas()])
+    snapshot = load_snapshot("app")
+    assert (snapshot['city'], snapshot['lat'], snapshot['lon']) == ("paris", 48.85, 2.35)
+    assert list(snapshot['charts']) == ["line"]
+
+def test_snapshot_without_a_location_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(startup_snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    (tmp_path / "app").mkdir()
+    with open(snapshot_path("app", "snapshot.json"), "w", encoding="utf-8") as f:
+        json.dump({'title': "⏳ Loading Paris...", 'charts': {}}, f)
+    assert load_snapshot("app") == {'city': None, 'lat': None, 'lon': None, 'charts': {}}
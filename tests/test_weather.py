@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from weather import PIDController, round_watering, simulate_soil_moisture, simulate_soil_moisture_batch
+
+def scalar_reference(rainfall, initial_moisture, target_moisture):
+    # The original one-plot loop
+    pid = PIDController(Kp=0.8, Ki=0.05, Kd=0.1, setpoint=target_moisture)
+    moisture = [initial_moisture]
+    watering = []
+    for day in range(5):
+        w = pid.compute(moisture[-1])
+        watering.append(round(w, 2))
+        moisture.append(min(moisture[-1] * 0.85 + rainfall[day] + w, 100.0))
+    return moisture, watering
+
+def test_rounding_matches_scalar_case():
+    moisture, watering = simulate_soil_moisture([1.1, 19.0, 0.3, 4.2, 0.5], 15.2, 34.9)
+    assert (moisture, watering) == scalar_reference([1.1, 19.0, 0.3, 4.2, 0.5], 15.2, 34.9)
+
+def test_batch_matches_scalar():
+    rng = np.random.default_rng(0)
+    n = 20000
+    rain = np.round(rng.uniform(0, 20, (n, 5)), 1)
+    initial = np.round(rng.uniform(0, 100, n), 1)
+    target = np.round(rng.uniform(20, 80, n), 1)
+    moisture, watering = simulate_soil_moisture_batch(rain, initial, target)
+    for i in range(n):
+        m, w = scalar_reference(rain[i].tolist(), float(initial[i]), float(target[i]))
+        assert moisture[i].tolist() == m
+        assert watering[i].tolist() == w
+
+def test_round_watering_halves():
+    values = np.array([0.125, 0.135, 2.675, 1.005, 18.715, -0.125, 3.0])
+    assert round_watering(values).tolist() == [round(v, 2) for v in values.tolist()]
+
+def test_short_rainfall_rejected():
+    with pytest.raises(ValueError):
+        simulate_soil_moisture([1.0, 2.0])
@@ -0,0 +1,23 @@
+import numpy as np
+
+from weather_archive import WeatherArchive
+
+def response(times, values, offset):
+    return {'latitude': 28.61, 'longitude': 77.2, 'utc_offset_seconds': offset,
+            'hourly': {'time': times, 'precipitation': values}}
+
+def test_local_and_gmt_hours_line_up(tmp_path):
+    archive = WeatherArchive(str(tmp_path))
+    # Same two UTC hours, once from the GMT archive API, once as local time at +02:00
+    archive.ingest(response(["2024-03-01T10:00", "2024-03-01T11:00"], [1.0, 2.0], 0))
+    archive.ingest(response(["2024-03-01T13:00"], [3.0], 7200))
+    values = np.concatenate([chunk[0] for _, chunk in archive.replay(
+        28.61, 77.2, ["precipitation"], np.datetime64("2024-03-01T10", "h"), np.datetime64("2024-03-01T12", "h"))])
+    assert values.tolist() == [1.0, 3.0]
+
+def test_sites_skips_other_folders(tmp_path):
+    archive = WeatherArchive(str(tmp_path))
+    archive.ingest(response(["2024-03-01T10:00"], [1.0], 0))
+    (tmp_path / "notes").mkdir()
+    (tmp_path / ".tmp").mkdir()
+    assert archive.sites() == [(28.61, 77.2)]
@@ -1,6 +1,8 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from instrumentation import traced
+
 # Simulated 5-day weather forecast (rainfall in mm/day)
 # Replace this with actual API integration in Week 3
 forecast_rainfall = [0.0, 2.0, 0.0, 5.0, 0.0]  # mm for next 5 days
@@ -23,25 +25,75 @@ class PIDController:
         self.previous_error = error
         return max(0, output)  # Only positive watering needed
 
-# Simulate Soil Moisture over 5 Days
-def simulate_soil_moisture(forecast_rainfall, initial_moisture=30.0, target_moisture=50.0):
-    pid = PIDController(Kp=0.8, Ki=0.05, Kd=0.1, setpoint=target_moisture)
-    moisture_levels = [initial_moisture]
-    watering_schedule = []
+# Vectorized PID for many plots at once (same maths as PIDController.compute)
+class BatchPIDController:
+    def __init__(self, Kp, Ki, Kd, setpoint):
+        setpoint = np.asarray(setpoint, dtype=float)
+        self.Kp = np.broadcast_to(np.asarray(Kp, dtype=float), setpoint.shape)
+        self.Ki = np.broadcast_to(np.asarray(Ki, dtype=float), setpoint.shape)
+        self.Kd = np.broadcast_to(np.asarray(Kd, dtype=float), setpoint.shape)
+        self.setpoint = setpoint
+        self.integral = np.zeros(setpoint.shape)
+        self.previous_error = np.zeros(setpoint.shape)
+
+    def compute(self, current_value):
+        error = self.setpoint - current_value
+        self.integral += error
+        derivative = error - self.previous_error
+        output = self.Kp * error + self.Ki * self.integral + self.Kd * derivative
+        self.previous_error = error
+        return np.maximum(0.0, output)  # Only positive watering needed
+
+SIM_DAYS = 5  # days simulate_soil_moisture covers
 
-    for day in range(5):
-        current_moisture = moisture_levels[-1]
-        # Rainfall contributes directly to moisture
-        rainfall = forecast_rainfall[day]
-        # Compute watering needed from PID
-        watering = pid.compute(current_moisture)
-        watering_schedule.append(round(watering, 2))
+def round_watering(values, digits=2):
+    # Same result as the built-in round() per element. np.round scales by 10**digits
+    # first, which can tip values lying next to a half the other way, so those
+    # few are redone with round().
+    rounded = np.round(np.asarray(values, dtype=float), digits)
+    scaled = np.asarray(values, dtype=float) * 10 ** digits
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        flat, exact = rounded.reshape(-1), np.asarray(values, dtype=float).reshape(-1)
+        for i in np.flatnonzero(near_half):
+            flat[i] = round(float(exact[i]), digits)
+    return rounded
 
-        # Update soil moisture (decay + rainfall + watering)
-        new_moisture = current_moisture * 0.85 + rainfall + watering  # simulate loss
-        moisture_levels.append(min(new_moisture, 100.0))  # cap at 100
+# Simulate N plots x T days in one go
+# rainfall: (N, T) mm/day, everything else scalar or one value per plot;
+# retention (share of moisture kept per day) may be scalar, per day (T,) or (N, T)
+@traced("sim.soil_batch")
+def simulate_soil_moisture_batch(rainfall, initial_moisture=30.0, target_moisture=50.0,
+                                 Kp=0.8, Ki=0.05, Kd=0.1, retention=0.85):
+    rainfall = np.atleast_2d(np.asarray(rainfall, dtype=float))
+    n_plots, n_days = rainfall.shape
+    initial_moisture = np.broadcast_to(np.asarray(initial_moisture, dtype=float), (n_plots,))
+    target_moisture = np.broadcast_to(np.asarray(target_moisture, dtype=float), (n_plots,))
+    retention = np.broadcast_to(np.asarray(retention, dtype=float), (n_plots, n_days))
 
-    return moisture_levels, watering_schedule
+    pid = BatchPIDController(Kp, Ki, Kd, setpoint=target_moisture)
+    moisture = np.empty((n_plots, n_days + 1))
+    watering = np.empty((n_plots, n_days))
+    moisture[:, 0] = initial_moisture
+
+    for day in range(n_days):
+        current_moisture = moisture[:, day]
+        watering[:, day] = pid.compute(current_moisture)
+        # Update soil moisture (decay + rainfall + watering), cap at 100
+        new_moisture = current_moisture * retention[:, day] + rainfall[:, day] + watering[:, day]
+        moisture[:, day + 1] = np.minimum(new_moisture, 100.0)
+
+    return moisture, round_watering(watering)
+
+# Simulate Soil Moisture over 5 Days (single plot, N=1 of the batch engine)
+@traced("sim.soil")
+def simulate_soil_moisture(forecast_rainfall, initial_moisture=30.0, target_moisture=50.0):
+    if len(forecast_rainfall) < SIM_DAYS:
+        raise ValueError(f"need {SIM_DAYS} days of rainfall, got {len(forecast_rainfall)}")
+    # Days past the fifth are not simulated, as before
+    moisture, watering = simulate_soil_moisture_batch(
+        [forecast_rainfall[:SIM_DAYS]], initial_moisture, target_moisture)
+    return moisture[0].tolist(), watering[0].tolist()
 
 # Plotting
 def plot_moisture(moisture_levels):
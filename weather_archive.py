@@ -0,0 +1,210 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import requests
+
+from forecast_cache import CACHE_DIR, COORD_DECIMALS
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+ARCHIVE_DIR = os.path.join(CACHE_DIR, "archive")
+HOURLY_VARS = ("precipitation", "temperature_2m")
+# numpy time unit per Open-Meteo block
+UNITS = {'hourly': 'h', 'daily': 'D'}
+
+# Layout: <root>/<lat>_<lon>/<hourly|daily>/<year>/<variable>.npy
+# Every partition is one float64 column covering the whole calendar year
+# (NaN where nothing was ingested), so a timestamp maps straight to an index
+# and no time column has to be stored or searched.
+
+# ------------------- HTTP FETCH -----------------------
+
+def fetch_history(lat, lon, start_date, end_date, hourly=HOURLY_VARS):
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": start_date,
+        "end_date": end_date,
+        "hourly": ",".join(hourly),
+        "timezone": "GMT",
+    }
+    try:
+        response = requests.get(ARCHIVE_URL, params=params, timeout=60)
+        if response.status_code == 200:
+            return response.json()
+    except requests.RequestException as e:
+        print("Archive fetch error:", e)
+    return None
+
+# ------------------- PARTITIONS ------------------------
+
+def location_key(lat, lon):
+    return f"{round(lat, COORD_DECIMALS):.{COORD_DECIMALS}f}_{round(lon, COORD_DECIMALS):.{COORD_DECIMALS}f}"
+
+def year_start(year, freq):
+    return np.datetime64(f"{year:04d}-01-01", UNITS[freq])
+
+def year_length(year, freq):
+    return int((year_start(year + 1, freq) - year_start(year, freq)).astype(np.int64))
+
+def year_of(stamp):
+    return int(stamp.astype('datetime64[Y]').astype(np.int64)) + 1970
+
+class WeatherArchive:
+    def __init__(self, root=None):
+        self.root = root or ARCHIVE_DIR
+
+    def path(self, lat, lon, freq, year, variable):
+        return os.path.join(self.root, location_key(lat, lon), freq, str(year), f"{variable}.npy")
+
+    def column(self, lat, lon, variable, year, freq='hourly'):
+        # Read-only memory map of one year, or None if nothing was ingested there
+        path = self.path(lat, lon, freq, year, variable)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def _writable(self, lat, lon, variable, year, freq):
+        path = self.path(lat, lon, freq, year, variable)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Created under a temporary name so readers never see a half-written file
+            tmp = f"{path}.{os.getpid()}.tmp"
+            column = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float64,
+                                               shape=(year_length(year, freq),))
+            column[:] = np.nan
+            column.flush()
+            del column
+            os.replace(tmp, path)
+        return np.lib.format.open_memmap(path, mode='r+')
+
+    # ------------------- INGEST ------------------------
+
+    def ingest(self, data, lat=None, lon=None):
+        # Merges the hourly and/or daily blocks of an Open-Meteo response (forecast
+        # or archive API); later values overwrite earlier ones for the same hour/day.
+        # Hourly stamps are stored in UTC: responses asked for with timezone=auto
+        # carry local times, shifted back here by their utc_offset_seconds (an
+        # offset like +05:30 lands on the UTC hour it starts in). Daily values are
+        # whole local calendar days and cannot be shifted, so they keep their date.
+        lat = data['latitude'] if lat is None else lat
+        lon = data['longitude'] if lon is None else lon
+        offset = np.timedelta64(int(data.get('utc_offset_seconds') or 0), 's')
+        written = 0
+        for freq, unit in UNITS.items():
+            block = data.get(freq)
+            if not block or not block.get('time'):
+                continue
+            times = np.array(block['time'], dtype='datetime64[s]')
+            if freq == 'hourly':
+                times = times - offset
+            times = times.astype(f'datetime64[{unit}]')
+            years = times.astype('datetime64[Y]').astype(np.int64) + 1970
+            for year in np.unique(years):
+                year = int(year)
+                in_year = years == year
+                index = (times[in_year] - year_start(year, freq)).astype(np.int64)
+                for variable, values in block.items():
+                    if variable == 'time':
+                        continue
+                    # None -> NaN through the float conversion
+                    values = np.array(values, dtype=float)[in_year]
+                    column = self._writable(lat, lon, variable, year, freq)
+                    column[index] = values
+                    column.flush()
+                    del column
+                    written += len(index)
+        return written
+
+    # ------------------- REPLAY ------------------------
+
+    def sites(self):
+        if not os.path.isdir(self.root):
+            return []
+        sites = []
+        for name in sorted(os.listdir(self.root)):
+            lat, _, lon = name.partition("_")
+            try:
+                sites.append((float(lat), float(lon)))
+            except ValueError:
+                continue  # not a site folder
+        return sites
+
+    def years(self, lat, lon, freq='hourly'):
+        folder = os.path.join(self.root, location_key(lat, lon), freq)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(name) for name in os.listdir(folder) if name.isdigit())
+
+    def replay(self, lat, lon, variables, start, end, freq='hourly'):
+        # Yields (first timestamp, [one array per variable]) for each year touched by
+        # [start, end). The arrays are slices of the memory maps, so nothing is read
+        # from disk until the simulator actually touches it; years or variables
+        # missing from the archive come back as NaN.
+        unit = UNITS[freq]
+        start = np.datetime64(start, unit)
+        end = np.datetime64(end, unit)
+        for year in range(year_of(start), year_of(end - 1) + 1):
+            first = year_start(year, freq)
+            low = max(int((start - first).astype(np.int64)), 0)
+            high = min(int((end - first).astype(np.int64)), year_length(year, freq))
+            if low >= high:
+                continue
+            pieces = []
+            for variable in variables:
+                column = self.column(lat, lon, variable, year, freq)
+                pieces.append(np.full(high - low, np.nan) if column is None else column[low:high])
+            yield first + low, pieces
+
+    def read(self, lat, lon, variables, start, end, freq='hourly'):
+        # Whole range as one array per variable (copies only when it spans several years)
+        pieces = [p for _, p in self.replay(lat, lon, variables, start, end, freq)]
+        if len(pieces) == 1:
+            return dict(zip(variables, pieces[0]))
+        return {variable: np.concatenate([p[i] for p in pieces]) if pieces else np.empty(0)
+                for i, variable in enumerate(variables)}
+
+def season_chunks(archive, lat, lon, start, end, size=None,
+                  rainfall="precipitation", temperature="temperature_2m"):
+    # (rainfall, temperature) chunks for season.simulate_season, straight off the memory maps
+    from season import CHUNK_HOURS, hourly_chunks
+
+    for _, (rain, temp) in archive.replay(lat, lon, (rainfall, temperature), start, end):
+        yield from hourly_chunks(rain, temp, size or CHUNK_HOURS)
+
+# ------------------- CLI ------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Open-Meteo weather archive.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch = commands.add_parser("fetch", help="download hourly history into the archive")
+    replay = commands.add_parser("replay", help="run the hourly PID model over archived weather")
+    for command in (fetch, replay):
+        command.add_argument("lat", type=float)
+        command.add_argument("lon", type=float)
+        command.add_argument("start", help="YYYY-MM-DD")
+        command.add_argument("end", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--root", help=f"archive directory (default {ARCHIVE_DIR})")
+    args = parser.parse_args(argv)
+
+    archive = WeatherArchive(args.root)
+    if args.command == "fetch":
+        data = fetch_history(args.lat, args.lon, args.start, args.end)
+        if data is None:
+            sys.exit(1)
+        print(f"{archive.ingest(data, args.lat, args.lon)} values archived")
+        return
+
+    from season import simulate_season
+
+    end = np.datetime64(args.end, 'D') + 1
+    water = 0.0
+    moisture = None
+    for _, moisture, watering in simulate_season(season_chunks(archive, args.lat, args.lon, args.start, end)):
+        water += watering.sum()
+    if moisture is not None:
+        print(f"final moisture {moisture[0, -1]:.1f} %, water {water:.0f} units")
+
+if __name__ == "__main__":
+    main()